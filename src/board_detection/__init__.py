@@ -1,2 +1,5 @@
-from .get_positions import get_positions
-from .fen_extractor import get_fen_from_position
\ No newline at end of file
+from .get_positions import get_positions, get_positions_batch
+from .fen_extractor import get_fen_from_position
+from .onnx_detector import start_detector_loading, detector_ready, get_detector
+from .sprite_matcher import SpriteMatcher
+from .backends import Detector, DETECTOR_BACKENDS, register_backend, create_backend, get_backend
@@ -0,0 +1,197 @@
+import time
+import logging
+import threading
+from typing import Protocol, runtime_checkable
+from .onnx_detector import OnnxDetector, get_detector, resolve_model_path, QUANTIZED_MODEL_FILENAME
+from .quantize import gate_passed
+from .detector_config import load_detector_config, DEFAULT_DETECTOR_CONFIG
+from .detector_stats import DetectorStats
+from .detections import detections_to_list
+from .board_region import BoardRegionTracker
+from .preprocess import frame_size, crop_frame
+from .sprite_matcher import SpriteMatcher
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+@runtime_checkable
+class Detector(Protocol):
+    """
+    Interface of a detection backend. detect() takes a PIL image or a BGRA
+    frame array whose top-left corner sits at origin in full-screenshot
+    coordinates, and returns boxes in the get_positions format
+    ([x, y, w, h, conf, class_id] lists, in full-screenshot coordinates), or
+    None if nothing was found.
+    """
+
+    name: str
+    stats: DetectorStats
+
+    def detect(self, image, origin=None):
+        ...
+
+
+# Backend name -> class; filled in by @register_backend
+DETECTOR_BACKENDS = {}
+
+
+def register_backend(name):
+    def decorator(cls):
+        cls.name = name
+        DETECTOR_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+class DetectorBackend:
+    """
+    Base class that loads the backend once and times every detect() call.
+    Subclasses implement load() and _detect(image, origin).
+    """
+
+    name = None
+
+    def __init__(self, config=None):
+        self.config = config or load_detector_config()
+        self.stats = DetectorStats(self.name)
+        self.stats.measure_load(self.load)
+
+    def load(self):
+        pass
+
+    def _detect(self, image, origin):
+        raise NotImplementedError
+
+    def detect(self, image, origin=None):
+        start = time.perf_counter()
+        try:
+            boxes = self._detect(image, origin or (0, 0))
+        except Exception:
+            self.stats.record((time.perf_counter() - start) * 1000.0, error=True)
+            raise
+        self.stats.record((time.perf_counter() - start) * 1000.0, found=bool(boxes))
+        return boxes
+
+    def summary(self):
+        return self.stats.summary()
+
+
+@register_backend("onnx")
+class OnnxBackend(DetectorBackend):
+    """The shared ONNX model (see select_model_path) on the full frame."""
+
+    def load(self):
+        self.detector = get_detector()
+
+    def _predict(self, image, origin):
+        detections = self.detector.predict(image)
+        detections[:, 0] += origin[0]
+        detections[:, 1] += origin[1]
+        return detections
+
+    def _detect(self, image, origin):
+        return detections_to_list(self._predict(image, origin))
+
+
+@register_backend("onnx_roi")
+class RoiOnnxBackend(OnnxBackend):
+    """
+    The ONNX model on the last known board area only. Falls back to the full
+    frame (and re-seeds the region) when the board is lost or moves out of it.
+    The region is kept in full-screenshot coordinates, so full screenshots
+    and board-region captures share it.
+    """
+
+    def load(self):
+        super().load()
+        self.board_region = BoardRegionTracker(margin_ratio=self.config["roi_margin"])
+
+    def _predict_in_region(self, image, origin):
+        """
+        Returns detections in full-screenshot coordinates, or None if the crop cannot be trusted.
+        """
+        width, height = frame_size(image)
+        crop = self.board_region.region((origin[0], origin[1], origin[0] + width, origin[1] + height))
+        if crop is None:
+            return None
+
+        image_crop = (crop[0] - origin[0], crop[1] - origin[1], crop[2] - origin[0], crop[3] - origin[1])
+        detections = self._predict(crop_frame(image, image_crop), crop[:2])
+        if self.board_region.accept(detections, crop):
+            return detections
+
+        logger.debug("Board lost or moved outside the tracked region; searching full frame")
+        return None
+
+    def _detect(self, image, origin):
+        detections = self._predict_in_region(image, origin)
+        if detections is None:
+            detections = self._predict(image, origin)
+            self.board_region.update(detections)
+        return detections_to_list(detections)
+
+
+@register_backend("onnx_int8")
+class QuantizedOnnxBackend(RoiOnnxBackend):
+    """The quantized model, with board-area cropping like onnx_roi."""
+
+    def load(self):
+        model_path = resolve_model_path(QUANTIZED_MODEL_FILENAME)
+        if not gate_passed(model_path, resolve_model_path()):
+            logger.warning("Quantized detector has not passed the accuracy gate; results may be wrong")
+        self.detector = OnnxDetector(model_path, self.config)
+        self.detector.warm_up()
+        self.board_region = BoardRegionTracker(margin_ratio=self.config["roi_margin"])
+
+
+@register_backend("sprite")
+class SpriteBackend(DetectorBackend):
+    """Sprite matching, using onnx_roi for uncertain frames and to learn sprites."""
+
+    def load(self):
+        self.fallback = RoiOnnxBackend(self.config)
+        self.matcher = SpriteMatcher(fallback=self.fallback.detect)
+
+    def _detect(self, image, origin):
+        return self.matcher(image, origin)
+
+    def summary(self):
+        summary = super().summary()
+        summary.update(self.matcher.stats())
+        return summary
+
+
+def create_backend(name, config=None):
+    """
+    Creates and loads the backend registered under `name`.
+    Raises ValueError for unknown names.
+    """
+    if name not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend '{name}'; expected one of {', '.join(DETECTOR_BACKENDS)}")
+    return DETECTOR_BACKENDS[name](config)
+
+
+# Backend used by get_positions, created on first use from detector_config.txt
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    Returns the configured backend. Falls back to the default backend if the
+    configured one is unknown or fails to load (e.g. no quantized model).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            config = load_detector_config()
+            try:
+                _backend = create_backend(config["backend"], config)
+            except (ValueError, FileNotFoundError) as e:
+                default = DEFAULT_DETECTOR_CONFIG["backend"]
+                logger.warning(f"Detector backend '{config['backend']}' unavailable ({e}); using {default}")
+                _backend = create_backend(default, config)
+            logger.info(f"Using detector backend '{_backend.name}'")
+        return _backend
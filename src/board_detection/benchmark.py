@@ -0,0 +1,269 @@
+import os
+import sys
+import glob
+import time
+import argparse
+import itertools
+import statistics
+import numpy as np
+from PIL import Image
+from .preprocess import INPUT_SIZE, RESAMPLE_FILTERS, LetterboxPreprocessor, letterbox_resize
+from .detector_config import load_detector_config, create_session
+from .detector_stats import summarize
+from .backends import DETECTOR_BACKENDS, create_backend
+from .onnx_detector import OnnxDetector
+from .fen_extractor import boxes_to_grid
+
+
+def _legacy_preprocess(image):
+    """
+    The original allocation-heavy path: new canvas, paste, astype, transpose, expand_dims.
+    """
+    image, x_offset, y_offset, scale = letterbox_resize(image, INPUT_SIZE)
+    image = np.array(image).astype(np.float32) / 255.0
+    image = image.transpose(2, 0, 1)
+    image = np.expand_dims(image, axis=0)
+    return image, x_offset, y_offset, scale
+
+
+def _time_call(func, image, iterations, warmup=3):
+    for _ in range(warmup):
+        func(image)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(image)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def bench_preprocess(image, iterations=50):
+    """
+    Compares the legacy preprocessing path with LetterboxPreprocessor for every
+    resample filter. Returns a list of (label, p50_ms, p95_ms) rows.
+    """
+    rows = [("legacy (lanczos)", *summarize(_time_call(_legacy_preprocess, image, iterations)))]
+    for name in RESAMPLE_FILTERS:
+        preprocessor = LetterboxPreprocessor(INPUT_SIZE, resample=name)
+        rows.append((f"preallocated ({name})", *summarize(_time_call(preprocessor, image, iterations))))
+    return rows
+
+
+def print_rows(title, rows):
+    print(title)
+    for label, p50, p95 in rows:
+        print(f"  {label:<32} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def load_sample_images(samples_dir):
+    """
+    Loads every PNG/JPEG screenshot in samples_dir as an RGB PIL image.
+    """
+    paths = []
+    for pattern in ("*.png", "*.jpg", "*.jpeg"):
+        paths.extend(glob.glob(os.path.join(samples_dir, pattern)))
+    return [Image.open(path).convert("RGB") for path in sorted(paths)]
+
+
+def sweep_settings(base_config, thread_counts, optimization_levels, execution_modes):
+    """
+    Yields (label, config) pairs for every combination of the sweep axes.
+    """
+    for threads, level, mode in itertools.product(thread_counts, optimization_levels, execution_modes):
+        config = dict(base_config)
+        config.update(intra_op_threads=threads, graph_optimization=level, execution_mode=mode)
+        # The cache would make every setting after the first load the same graph
+        config["optimized_model_path"] = ""
+        yield f"threads={threads} opt={level} mode={mode}", config
+
+
+def bench_detector(model_path, images, settings, iterations=10):
+    """
+    Measures preprocess + session.run latency on the sample images for every
+    (label, config) setting. Returns a list of (label, p50_ms, p95_ms) rows.
+    """
+    rows = []
+    for label, config in settings:
+        session = create_session(model_path, config)
+        input_name = session.get_inputs()[0].name
+        output_name = session.get_outputs()[0].name
+        preprocessor = LetterboxPreprocessor(INPUT_SIZE, config["resample"])
+
+        def infer(image):
+            tensor, _, _, _ = preprocessor(image)
+            session.run([output_name], {input_name: tensor})
+
+        samples = []
+        for image in images:
+            samples.extend(_time_call(infer, image, iterations, warmup=1))
+        rows.append((label, *summarize(samples)))
+        print(f"  {label:<44} p50 {rows[-1][1]:8.2f} ms   p95 {rows[-1][2]:8.2f} ms")
+    return rows
+
+
+def _csv_ints(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _csv_strings(value):
+    return [v.strip().lower() for v in value.split(",") if v.strip()]
+
+
+def run_detector_benchmark(argv=None):
+    """
+    Entry point for `--bench-detector`: sweeps ONNX Runtime session settings on
+    sample screenshots and reports p50/p95 latency per setting.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark detector session settings")
+    parser.add_argument("--bench-detector", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--model", default="chess_detection.onnx", help="Path to the ONNX model")
+    parser.add_argument("--samples", default=".", help="Folder with sample screenshots")
+    parser.add_argument("--iterations", type=int, default=10, help="Runs per image per setting")
+    cpu_count = os.cpu_count() or 1
+    default_threads = ",".join(str(t) for t in sorted({1, 2, 4, cpu_count}) if t <= cpu_count)
+    parser.add_argument("--threads", type=_csv_ints, default=_csv_ints(default_threads))
+    parser.add_argument("--opt-levels", type=_csv_strings, default=["basic", "extended", "all"])
+    parser.add_argument("--modes", type=_csv_strings, default=["sequential", "parallel"])
+    args, _ = parser.parse_known_args(argv)
+
+    images = load_sample_images(args.samples)
+    if not images:
+        print(f"No sample screenshots found in {args.samples}")
+        return 1
+    if not os.path.exists(args.model):
+        print(f"Model not found: {args.model}")
+        return 1
+
+    settings = list(sweep_settings(load_detector_config(), args.threads, args.opt_levels, args.modes))
+    print(f"Benchmarking {len(settings)} settings on {len(images)} screenshot(s)")
+    rows = bench_detector(args.model, images, settings, args.iterations)
+
+    best = min(rows, key=lambda row: row[1])
+    print(f"Fastest setting: {best[0]} (p50 {best[1]:.2f} ms, p95 {best[2]:.2f} ms)")
+    return 0
+
+
+def _placement(boxes):
+    result = boxes_to_grid(boxes) if boxes else None
+    return None if result is None else result[3]
+
+
+def bench_backends(images, names, iterations=10, reference="onnx"):
+    """
+    Runs every named detection backend over the sample images and compares its
+    piece placement with the `reference` backend. Returns a list of summaries
+    (the backend's stats plus an `agreement` fraction).
+    """
+    config = load_detector_config()
+    reference_backend = create_backend(reference, config)
+    expected = [_placement(reference_backend.detect(image)) for image in images]
+
+    summaries = []
+    for name in names:
+        backend = reference_backend if name == reference else create_backend(name, config)
+        backend.stats.reset()
+        agreed = 0
+        for _ in range(iterations):
+            # Frames in order, as the auto loop sees them, so trackers and caches warm up
+            for image, placement in zip(images, expected):
+                agreed += _placement(backend.detect(image)) == placement
+        summary = backend.summary()
+        summary["agreement"] = agreed / (iterations * len(images))
+        summaries.append(summary)
+
+        memory = summary["load_memory_mb"]
+        memory = "   n/a" if memory is None else f"{memory:6.1f}"
+        print(f"  {name:<10} p50 {summary['p50_ms']:8.2f} ms   p95 {summary['p95_ms']:8.2f} ms   "
+              f"load {memory} MB   agreement {summary['agreement']:6.1%}")
+    return summaries
+
+
+def run_backend_benchmark(argv=None):
+    """
+    Entry point for `--bench-backends`: reports latency, memory and agreement
+    with the full ONNX model for each detection backend.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark detection backends")
+    parser.add_argument("--bench-backends", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--samples", default=".", help="Folder with sample screenshots")
+    parser.add_argument("--iterations", type=int, default=10, help="Passes over the samples per backend")
+    parser.add_argument("--backends", type=_csv_strings, default=list(DETECTOR_BACKENDS))
+    parser.add_argument("--min-agreement", type=float, default=1.0,
+                        help="Agreement needed for a backend to be recommended")
+    args, _ = parser.parse_known_args(argv)
+
+    images = load_sample_images(args.samples)
+    if not images:
+        print(f"No sample screenshots found in {args.samples}")
+        return 1
+
+    summaries = []
+    print(f"Benchmarking {len(args.backends)} backend(s) on {len(images)} screenshot(s)")
+    for name in args.backends:
+        try:
+            summaries.extend(bench_backends(images, [name], args.iterations))
+        except (ValueError, FileNotFoundError) as e:
+            print(f"  {name:<10} unavailable: {e}")
+
+    accurate = [s for s in summaries if s["agreement"] >= args.min_agreement]
+    if accurate:
+        best = min(accurate, key=lambda s: s["p50_ms"])
+        print(f"Fastest accurate backend: {best['backend']} (p50 {best['p50_ms']:.2f} ms)")
+        print(f"Set 'backend = {best['backend']}' in detector_config.txt to use it")
+    return 0
+
+
+def bench_batch(detector, images, batch_sizes, iterations=5):
+    """
+    Compares N single predict() calls with one predict_batch() of N images.
+    Returns a list of (batch_size, single_ms_per_image, batch_ms_per_image) rows.
+    """
+    rows = []
+    for size in batch_sizes:
+        batch = [images[i % len(images)] for i in range(size)]
+        single = _time_call(lambda frames: [detector.predict(frame) for frame in frames], batch, iterations, warmup=1)
+        batched = _time_call(detector.predict_batch, batch, iterations, warmup=1)
+        rows.append((size, statistics.median(single) / size, statistics.median(batched) / size))
+        print(f"  batch {size:<3} single {rows[-1][1]:8.2f} ms/image   batched {rows[-1][2]:8.2f} ms/image")
+    return rows
+
+
+def run_batch_benchmark(argv=None):
+    """
+    Entry point for `--bench-batch`: measures per-image latency of batched
+    inference against one session.run per image.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark batched detector inference")
+    parser.add_argument("--bench-batch", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--model", default="chess_detection.onnx", help="Path to the ONNX model")
+    parser.add_argument("--samples", default=".", help="Folder with sample screenshots")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--batch-sizes", type=_csv_ints, default=[1, 2, 4, 8])
+    args, _ = parser.parse_known_args(argv)
+
+    images = load_sample_images(args.samples)
+    if not images:
+        print(f"No sample screenshots found in {args.samples}")
+        return 1
+    if not os.path.exists(args.model):
+        print(f"Model not found: {args.model}")
+        return 1
+
+    detector = OnnxDetector(args.model)
+    if not detector.supports_batch:
+        print("Model has a fixed batch size; predict_batch runs images one at a time")
+    bench_batch(detector, images, args.batch_sizes, args.iterations)
+    return 0
+
+
+if __name__ == "__main__":
+    if "--bench-detector" in sys.argv:
+        sys.exit(run_detector_benchmark(sys.argv[1:]))
+    if "--bench-backends" in sys.argv:
+        sys.exit(run_backend_benchmark(sys.argv[1:]))
+    if "--bench-batch" in sys.argv:
+        sys.exit(run_batch_benchmark(sys.argv[1:]))
+
+    image_path = sys.argv[1] if len(sys.argv) > 1 else "screenshot.png"
+    image = Image.open(image_path).convert("RGB")
+    print_rows(f"Preprocessing {image.size[0]}x{image.size[1]} -> {INPUT_SIZE}x{INPUT_SIZE}", bench_preprocess(image))
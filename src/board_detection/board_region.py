@@ -0,0 +1,108 @@
+import logging
+import threading
+from .detections import BOARD_CLASS_ID
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+class BoardRegionTracker:
+    """
+    Remembers where the chessboard (class 12) was last found so later frames
+    only need to run the detector on the board rectangle plus a margin.
+
+    A crop result is only trusted when the board is found well inside the
+    crop and keeps roughly the same size; otherwise the caller falls back to
+    a full-frame search and re-seeds the tracker.
+    """
+
+    def __init__(self, margin_ratio=0.1, min_margin=16, size_tolerance=0.1):
+        self.margin_ratio = margin_ratio
+        self.min_margin = min_margin
+        self.size_tolerance = size_tolerance
+        self.board_box = None  # (x, y, w, h) in full-screenshot coordinates
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            if self.board_box is not None:
+                logger.debug("Board region reset; next frame will be searched in full")
+            self.board_box = None
+
+    def _margin(self, box):
+        return max(self.min_margin, int(max(box[2], box[3]) * self.margin_ratio))
+
+    def _expand(self, box):
+        """Returns the unclamped (left, top, right, bottom) crop around a box."""
+        x, y, w, h = box
+        margin = self._margin(box)
+        return int(x) - margin, int(y) - margin, int(x + w) + margin, int(y + h) + margin
+
+    def region(self, bounds=None):
+        """
+        Returns the (left, top, right, bottom) crop around the last known board,
+        clamped to bounds (the image's (left, top, right, bottom) on screen)
+        when given, or None if the board is not known or outside bounds.
+        """
+        with self._lock:
+            box = self.board_box
+        if box is None:
+            return None
+
+        left, top, right, bottom = self._expand(box)
+        if bounds is not None:
+            left, top = max(bounds[0], left), max(bounds[1], top)
+            right, bottom = min(bounds[2], right), min(bounds[3], bottom)
+            if right <= left or bottom <= top:
+                return None
+        return left, top, right, bottom
+
+    @staticmethod
+    def find_board(detections):
+        """
+        Returns the first chessboard box (x, y, w, h) in a detection array, or None.
+        """
+        if detections is None or len(detections) == 0:
+            return None
+        boards = detections[detections[:, 5] == BOARD_CLASS_ID]
+        if len(boards) == 0:
+            return None
+        return tuple(float(v) for v in boards[0, :4])
+
+    def update(self, detections):
+        """
+        Seeds the tracker from a full-frame detection result.
+        """
+        board = self.find_board(detections)
+        with self._lock:
+            self.board_box = board
+        if board is None:
+            logger.debug("No board in full-frame detections; region cleared")
+
+    def accept(self, detections, crop):
+        """
+        Decides whether detections from `crop` (already in full-frame
+        coordinates) can be trusted. Follows small board movements.
+        """
+        board = self.find_board(detections)
+        with self._lock:
+            previous = self.board_box
+        if board is None or previous is None:
+            return False
+
+        x, y, w, h = board
+        # A board touching the crop edge may extend beyond it, unless that
+        # edge is the frame border (the crop was clamped there)
+        edge = max(2, self._margin(previous) // 4)
+        gaps = (x - crop[0], y - crop[1], crop[2] - (x + w), crop[3] - (y + h))
+        inside = all(gap >= edge or side != full_side
+                     for gap, side, full_side in zip(gaps, crop, self._expand(previous)))
+        same_size = (abs(w - previous[2]) <= previous[2] * self.size_tolerance
+                     and abs(h - previous[3]) <= previous[3] * self.size_tolerance)
+        if not (inside and same_size):
+            return False
+
+        with self._lock:
+            self.board_box = board
+        return True
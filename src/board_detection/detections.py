@@ -0,0 +1,45 @@
+import numpy as np
+
+# Minimum confidence for a detection to be kept
+conf = 0.7
+
+# class_id of the chessboard itself; 0-11 are pieces
+BOARD_CLASS_ID = 12.0
+
+def scale_bbox(detection, x_offset, y_offset, scale):
+    """
+    Scales bounding box coordinates from padded/resized image to original image dimensions.
+    Accepts a single detection row or an (N, 6) array of rows.
+    """
+    detection = np.asarray(detection, dtype=np.float32)
+    x, y = detection[..., 0], detection[..., 1]
+    w, h = detection[..., 2], detection[..., 3]
+
+    scaled = detection.copy()
+    scaled[..., 0] = (x - x_offset) / scale
+    scaled[..., 1] = (y - y_offset) / scale
+    scaled[..., 2] = (w - x) / scale  # Width in original dimensions
+    scaled[..., 3] = (h - y) / scale  # Height in original dimensions
+    np.trunc(scaled[..., :4], out=scaled[..., :4])  # Same truncation as int()
+    return scaled
+
+def postprocess_detections(output, x_offset, y_offset, scale, threshold=None):
+    """
+    Filters raw model output by confidence and maps the surviving boxes back
+    to original image coordinates in a single vectorized pass.
+    Returns a float32 array of shape (N, 6): x, y, w, h, confidence, class_id.
+    """
+    threshold = conf if threshold is None else threshold
+    output = np.asarray(output, dtype=np.float32)
+    output = output.reshape(-1, output.shape[-1])
+    kept = output[output[:, 4] > threshold]
+    return scale_bbox(kept, x_offset, y_offset, scale)
+
+def detections_to_list(detections):
+    """
+    Converts a detection array to the list-of-lists format used by
+    get_fen_from_position and the executor modules. Returns None when empty.
+    """
+    if detections is None or len(detections) == 0:
+        return None
+    return detections.tolist()
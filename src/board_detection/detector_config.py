@@ -0,0 +1,227 @@
+import os
+import logging
+import onnxruntime as ort
+from utils.get_root_dir import get_root_dir
+from .preprocess import RESAMPLE_FILTERS
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DETECTOR_CONFIG_FILE = os.path.join(get_root_dir(), "detector_config.txt")
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+DEFAULT_DETECTOR_CONFIG = {
+    "intra_op_threads": 0,
+    "inter_op_threads": 0,
+    "graph_optimization": "all",
+    "execution_mode": "sequential",
+    "optimized_model_path": "",
+    "enable_cpu_mem_arena": True,
+    "enable_mem_pattern": True,
+    "resample": "lanczos",
+    "prefer_quantized": True,
+    "backend": "onnx_roi",
+    "roi_margin": 0.1,
+    "pipeline": "threads",
+}
+
+PIPELINE_MODES = ("threads", "processes")
+
+# Replaced by `backend`; true meant onnx_roi, false the full-frame onnx backend
+DEPRECATED_ROI_TRACKING = "roi_tracking"
+
+
+def create_default_detector_config(config_path):
+    """Creates a default detector config file with user-friendly comments."""
+    with open(config_path, "w") as f:
+        f.write("# ==================================\n")
+        f.write("# ChessPilot Detector Configuration\n")
+        f.write("# ==================================\n")
+        f.write("# ONNX Runtime settings for the piece detector.\n")
+        f.write("# Be sure to restart the app after editing this file.\n\n")
+
+        f.write("# Threads used inside a single operator (0 = let ONNX Runtime decide)\n")
+        f.write("intra_op_threads = 0\n\n")
+
+        f.write("# Threads used to run independent operators in parallel (0 = default)\n")
+        f.write("inter_op_threads = 0\n\n")
+
+        f.write("# Graph optimization level: disable, basic, extended, all\n")
+        f.write("graph_optimization = all\n\n")
+
+        f.write("# Execution mode: sequential or parallel\n")
+        f.write("execution_mode = sequential\n\n")
+
+        f.write("# Where to cache the optimized model (empty = no cache). Each model\n")
+        f.write("# gets its own file, e.g. cache.onnx -> cache.chess_detection.onnx.\n")
+        f.write("# Later startups load the cached graph and skip optimization.\n")
+        f.write("optimized_model_path =\n\n")
+
+        f.write("# Memory arena behaviour (true/false)\n")
+        f.write("enable_cpu_mem_arena = true\n")
+        f.write("enable_mem_pattern = true\n\n")
+
+        f.write("# Resize filter: nearest, box, bilinear, hamming, bicubic, lanczos\n")
+        f.write("resample = lanczos\n\n")
+
+        f.write("# Load chess_detection.int8.onnx instead of the float model when it\n")
+        f.write("# has passed the accuracy gate (see --quantize-detector)\n")
+        f.write("prefer_quantized = true\n\n")
+
+        f.write("# Detection backend:\n")
+        f.write("#   onnx      - ONNX model on the full screen\n")
+        f.write("#   onnx_roi  - ONNX model on the last known board area only\n")
+        f.write("#   onnx_int8 - quantized ONNX model on the board area\n")
+        f.write("#   sprite    - match learned piece sprites, ONNX when unsure\n")
+        f.write("backend = onnx_roi\n\n")
+
+        f.write("# Margin around the tracked board area, as a fraction of the board size\n")
+        f.write("roi_margin = 0.1\n\n")
+
+        f.write("# How auto mode reads the board:\n")
+        f.write("#   threads   - capture and detection threads inside the app\n")
+        f.write("#   processes - separate capture and detector processes sharing frames\n")
+        f.write("#               through shared memory; keeps the GUI responsive on busy machines\n")
+        f.write("pipeline = threads\n")
+
+    logger.info(f"Created default detector config file at {config_path}")
+
+
+def _parse_value(key, raw):
+    default = DEFAULT_DETECTOR_CONFIG[key]
+    if isinstance(default, bool):
+        if raw.lower() in ("1", "true", "yes", "on"):
+            return True
+        if raw.lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(f"expected true/false, got '{raw}'")
+    if isinstance(default, int):
+        value = int(raw)
+        if value < 0:
+            raise ValueError("thread counts cannot be negative")
+        return value
+    if isinstance(default, float):
+        value = float(raw)
+        if value < 0:
+            raise ValueError("must not be negative")
+        return value
+    if key == "graph_optimization" and raw.lower() not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"expected one of {', '.join(GRAPH_OPTIMIZATION_LEVELS)}")
+    if key == "execution_mode" and raw.lower() not in EXECUTION_MODES:
+        raise ValueError(f"expected one of {', '.join(EXECUTION_MODES)}")
+    if key == "resample" and raw.lower() not in RESAMPLE_FILTERS:
+        raise ValueError(f"expected one of {', '.join(RESAMPLE_FILTERS)}")
+    if key == "pipeline" and raw.lower() not in PIPELINE_MODES:
+        raise ValueError(f"expected one of {', '.join(PIPELINE_MODES)}")
+    return raw if key == "optimized_model_path" else raw.lower()
+
+
+def load_detector_config(config_path=DETECTOR_CONFIG_FILE):
+    """
+    Loads detector settings from a `key = value` file. Creates a default file
+    with comments if missing. Unknown keys and bad values are logged and skipped.
+    """
+    config = dict(DEFAULT_DETECTOR_CONFIG)
+
+    if not os.path.exists(config_path):
+        try:
+            create_default_detector_config(config_path)
+        except OSError as e:
+            logger.warning(f"Could not create detector config at {config_path}: {e}")
+            return config
+
+    seen = set()
+    roi_tracking = None
+    with open(config_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, sep, raw = line.partition("=")
+            key, raw = key.strip(), raw.strip()
+            if sep and key == DEPRECATED_ROI_TRACKING:
+                roi_tracking = raw.lower() not in ("0", "false", "no", "off")
+                continue
+            if not sep or key not in DEFAULT_DETECTOR_CONFIG:
+                logger.warning(f"Ignoring unknown detector config line '{line}'")
+                continue
+            try:
+                config[key] = _parse_value(key, raw)
+                seen.add(key)
+            except ValueError as e:
+                logger.warning(f"Invalid value for '{key}' in detector config ({e}); keeping default")
+
+    if roi_tracking is not None:
+        logger.info(f"'{DEPRECATED_ROI_TRACKING}' in detector config is deprecated; use 'backend' instead")
+        if "backend" not in seen:
+            config["backend"] = "onnx_roi" if roi_tracking else "onnx"
+
+    logger.info(f"Detector config: {config}")
+    return config
+
+
+def build_session_options(config):
+    """
+    Translates a detector config dict into ort.SessionOptions.
+    """
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = config["intra_op_threads"]
+    options.inter_op_num_threads = config["inter_op_threads"]
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[config["graph_optimization"]]
+    options.execution_mode = EXECUTION_MODES[config["execution_mode"]]
+    options.enable_cpu_mem_arena = config["enable_cpu_mem_arena"]
+    options.enable_mem_pattern = config["enable_mem_pattern"]
+    return options
+
+
+def _resolve_cache_path(cache_path, model_path):
+    """
+    Returns the optimized graph cache for model_path: `<cache>.<model-stem>.onnx`,
+    so the float and quantized models never load each other's graph.
+    """
+    if not cache_path:
+        return None
+    if not os.path.isabs(cache_path):
+        cache_path = os.path.join(get_root_dir(), cache_path)
+    root, ext = os.path.splitext(cache_path)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return f"{root}.{stem}{ext or '.onnx'}"
+
+
+def create_session(model_path, config=None):
+    """
+    Creates an InferenceSession for model_path using the given detector config.
+    When optimized_model_path is set, the optimized graph is written to a
+    per-model file derived from it on first use and loaded directly (without
+    re-optimizing) while it is newer than the source model.
+    """
+    config = config or DEFAULT_DETECTOR_CONFIG
+    options = build_session_options(config)
+    providers = ["CPUExecutionProvider"]
+
+    cache_path = _resolve_cache_path(config.get("optimized_model_path"), model_path)
+    if cache_path:
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(model_path):
+            logger.info(f"Loading cached optimized detector model from {cache_path}")
+            options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS["disable"]
+            try:
+                return ort.InferenceSession(cache_path, sess_options=options, providers=providers)
+            except Exception as e:
+                logger.warning(f"Cached optimized model unusable ({e}); rebuilding it")
+                options = build_session_options(config)
+        options.optimized_model_filepath = cache_path
+        logger.info(f"Optimized detector model will be cached at {cache_path}")
+
+    return ort.InferenceSession(model_path, sess_options=options, providers=providers)
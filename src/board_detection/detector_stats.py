@@ -0,0 +1,86 @@
+import os
+import time
+import statistics
+import threading
+from collections import deque
+
+
+def summarize(samples):
+    """
+    Returns (p50, p95) in milliseconds for a list of latency samples.
+    """
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return statistics.median(ordered), ordered[p95_index]
+
+
+def process_memory_mb():
+    """
+    Returns the resident memory of this process in MB, or None if unknown.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import win32api
+        import win32process
+        info = win32process.GetProcessMemoryInfo(win32api.GetCurrentProcess())
+        return info["WorkingSetSize"] / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class DetectorStats:
+    """
+    Latency and memory counters shared by every detection backend.
+    Keeps the most recent `window` latency samples for percentiles.
+    """
+
+    def __init__(self, name, window=500):
+        self.name = name
+        self.calls = 0
+        self.misses = 0  # Calls that returned no detections
+        self.errors = 0
+        self.load_ms = None
+        self.load_memory_mb = None
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def measure_load(self, load):
+        """
+        Runs load() and records how long it took and how much memory it added.
+        """
+        memory_before = process_memory_mb()
+        start = time.perf_counter()
+        load()
+        self.load_ms = (time.perf_counter() - start) * 1000.0
+        memory_after = process_memory_mb()
+        if memory_before is not None and memory_after is not None:
+            self.load_memory_mb = memory_after - memory_before
+
+    def record(self, elapsed_ms, found=True, error=False):
+        with self._lock:
+            self.calls += 1
+            self.samples.append(elapsed_ms)
+            if error:
+                self.errors += 1
+            elif not found:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.misses = self.errors = 0
+            self.samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = list(self.samples)
+            summary = {"backend": self.name, "calls": self.calls,
+                       "misses": self.misses, "errors": self.errors}
+        summary["p50_ms"], summary["p95_ms"] = summarize(samples) if samples else (None, None)
+        summary["load_ms"] = self.load_ms
+        summary["load_memory_mb"] = self.load_memory_mb
+        summary["rss_mb"] = process_memory_mb()
+        return summary
@@ -1,12 +1,31 @@
 import logging
-from .get_positions import get_positions
 
 # Setup Logger
 # Logger setup
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-def get_fen_from_position(color, boxes):
+# Mapping from class_id to FEN characters
+CLASS_TO_FEN = {
+    0: 'p',
+    1: 'r',
+    2: 'n',
+    3: 'b',
+    4: 'q',
+    5: 'k',
+    6: 'P',
+    7: 'R',
+    8: 'N',
+    9: 'B',
+    10: 'Q',
+    11: 'K',
+}
+
+def boxes_to_grid(boxes):
+    """
+    Places detected pieces on an 8x8 grid in screen orientation (row 0 is the top of the board).
+    Returns (chessboard_x, chessboard_y, square_size, grid) or None if no board was detected.
+    """
     # Find the chessboard (class_id 12.0)
     chessboard_boxes = [box for box in boxes if box[5] == 12.0]
     if not chessboard_boxes:
@@ -17,22 +36,6 @@ def get_fen_from_position(color, boxes):
     chessboard_y = chessboard_box[1]
     square_size = chessboard_box[2] / 8.0  # Calculate square size based on chessboard width
 
-    # Mapping from class_id to FEN characters
-    class_to_fen = {
-        0: 'p',
-        1: 'r',
-        2: 'n',
-        3: 'b',
-        4: 'q',
-        5: 'k',
-        6: 'P',
-        7: 'R',
-        8: 'N',
-        9: 'B',
-        10: 'Q',
-        11: 'K',
-    }
-
     # Filter out the chessboard and process other detections
     filtered_boxes = [box for box in boxes if box[5] != 12.0]
 
@@ -52,11 +55,16 @@ def get_fen_from_position(color, boxes):
         row_index = int(rel_y // square_size)
         # Check if indices are within bounds
         if 0 <= file_index < 8 and 0 <= row_index < 8:
-            fen_char = class_to_fen.get(int(class_id), '?')  # Use '?' if class_id is unknown
+            fen_char = CLASS_TO_FEN.get(int(class_id), '?')  # Use '?' if class_id is unknown
             # Place the piece in the grid (row_index corresponds to chess rank)
             grid[row_index][file_index] = fen_char
 
-    # Convert the grid to FEN notation
+    return (chessboard_x, chessboard_y, square_size, grid)
+
+def grid_to_fen(grid, color):
+    """
+    Converts a screen-oriented 8x8 grid to a FEN string, flipping it when playing black.
+    """
     fen_rows = []
     for row in grid:
         fen_part = []
@@ -82,7 +90,14 @@ def get_fen_from_position(color, boxes):
     if color == 'b':
         fen = flip_board(fen)
 
-    return (chessboard_x, chessboard_y, square_size, fen)
+    return fen
+
+def get_fen_from_position(color, boxes):
+    result = boxes_to_grid(boxes)
+    if result is None:
+        return None
+    chessboard_x, chessboard_y, square_size, grid = result
+    return (chessboard_x, chessboard_y, square_size, grid_to_fen(grid, color))
 
 def flip_board(fen):
     """Flip the chessboard FEN notation for the opposite perspective."""
@@ -91,6 +106,8 @@ def flip_board(fen):
     return "/".join(flipped_rows) + " " + ' '.join(fen.split()[1:])
 
 if __name__ == "__main__":
+    from .get_positions import get_positions
+
     # Ask for the color (w or b)
     image_path = "chess-screenshot.png"
     boxes = get_positions(image_path)
@@ -1,95 +1,29 @@
-import numpy as np
-import onnxruntime as ort
 from PIL import Image
-from utils.resource_path import resource_path
-import sys
-import os
 import logging
+from .onnx_detector import get_detector
+from .detections import detections_to_list
+from .backends import get_backend
 
 # Logger setup
 logger = logging.getLogger("getpositions")
 logger.setLevel(logging.DEBUG)
 
-# Use the helper function to get the correct model path
-model_path = resource_path("chess_detection.onnx")
-if not os.path.exists(model_path):
-    logger.error(
-        "Missing chess_detection.onnx – please download and place it in the project root. "
-        "See README for instructions: https://github.com/OTAKUWeBer/ChessPilot/blob/main/README.md"
-    )
-    sys.exit(1)
-
-# Load the ONNX model from the correct path
-session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
-input_name = session.get_inputs()[0].name
-output_name = session.get_outputs()[0].name
-
-conf = 0.7
-
-def letterbox_resize(image, target_size):
-    """
-    Resizes the image to fit within the target_size, maintaining the aspect ratio.
-    Adds padding only to one dimension (either top/bottom or left/right) to make the image square.
-    """
-    orig_w, orig_h = image.size
-    scale = min(target_size / orig_w, target_size / orig_h)
-
-    new_w = int(orig_w * scale)
-    new_h = int(orig_h * scale)
-
-    resized = image.resize((new_w, new_h), Image.LANCZOS)
-
-    x_offset = (target_size - new_w) // 2
-    y_offset = (target_size - new_h) // 2
-
-    padded = Image.new("RGB", (target_size, target_size), (0, 0, 0))
-    padded.paste(resized, (x_offset, y_offset))
-
-    return padded, x_offset, y_offset, scale
-
 def preprocess_image(image):
     """
     Prepares the image for model inference by resizing, normalizing, and formatting.
+    Writes into a reusable per-thread tensor instead of allocating new buffers.
     """
-    image, x_offset, y_offset, scale = letterbox_resize(image, 640)
-    image = np.array(image).astype(np.float32) / 255.0  # Normalize
-    image = image.transpose(2, 0, 1)  # HWC to CHW
-    image = np.expand_dims(image, axis=0)  # Add batch dimension
-    return image, x_offset, y_offset, scale
+    return get_detector().preprocess(image)
 
-def scale_bbox(detection, x_offset, y_offset, scale):
-    """
-    Scales bounding box coordinates from padded/resized image to original image dimensions.
-    """
-    x, y, w, h = detection[:4]
-    new_x = int((x - x_offset) / scale)
-    new_y = int((y - y_offset) / scale)
-    new_w = int((w - x) / scale)  # Width in original dimensions
-    new_h = int((h - y) / scale)  # Height in original dimensions
-    
-    scaled = detection.copy()
-    scaled[:4] = [new_x, new_y, new_w, new_h]
-    return scaled
-
-def predict(image):
-    """
-    Runs model inference and returns processed detections.
+def get_positions(image_input, origin=None):
     """
-    img_array, x_offset, y_offset, scale = preprocess_image(image)
-    output = session.run([output_name], {input_name: img_array})[0]
-    output = np.squeeze(output)
-    
-    detections = []
-    for r in output:
-        if r[4] > conf:
-            scaled = scale_bbox(r, x_offset, y_offset, scale)
-            detections.append(scaled.tolist())  # Convert to list for compatibility
-    
-    return detections
+    Handles image loading and runs the configured detection backend.
 
-def get_positions(image_input):
-    """
-    Handles image loading and executes prediction.
+    If `origin` is given, the image is a region already cropped around the
+    board (e.g. from capture_region) whose top-left corner sits at `origin`
+    in full-screenshot coordinates. The backend then runs on it directly and
+    the boxes are returned in full-screenshot coordinates; backends that track
+    the board share that state between full screenshots and regions.
     """
     try:
         if isinstance(image_input, str):
@@ -100,8 +34,27 @@ def get_positions(image_input):
         print(f"Error loading image: {e}")
         return []
 
-    predictions = predict(image)
-    return predictions if predictions else None
+    return get_backend().detect(image, origin)
+
+def get_positions_batch(image_inputs):
+    """
+    Runs the full-frame detector on many screenshots (PIL images or paths) in
+    as few session runs as the model allows. Returns one get_positions-style
+    result per input, each scaled with its own letterbox parameters.
+    Unreadable inputs give [] like get_positions.
+    """
+    images, slots = [], []
+    results = [[] for _ in image_inputs]
+    for index, image_input in enumerate(image_inputs):
+        try:
+            images.append(Image.open(image_input) if isinstance(image_input, str) else image_input)
+            slots.append(index)
+        except Exception as e:
+            print(f"Error loading image: {e}")
+
+    for index, detections in zip(slots, get_detector().predict_batch(images)):
+        results[index] = detections_to_list(detections)
+    return results
 
 if __name__ == "__main__":
     image_path = "screenshot.png"
@@ -0,0 +1,156 @@
+import os
+import logging
+import threading
+from concurrent.futures import Future
+import numpy as np
+from utils.resource_path import resource_path
+from .preprocess import INPUT_SIZE, LetterboxPreprocessor
+from .detector_config import load_detector_config, create_session
+from .detections import postprocess_detections
+from .quantize import gate_passed
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+MODEL_FILENAME = "chess_detection.onnx"
+QUANTIZED_MODEL_FILENAME = "chess_detection.int8.onnx"
+README_URL = "https://github.com/OTAKUWeBer/ChessPilot/blob/main/README.md"
+
+# Upper bound on images per session.run in predict_batch
+MAX_BATCH_SIZE = 8
+
+
+class OnnxDetector:
+    """
+    Wraps one ONNX Runtime session of the piece detector.
+    session.run is thread-safe; preprocessing buffers are kept per thread.
+    """
+
+    def __init__(self, model_path, config=None):
+        self.model_path = model_path
+        self.config = config or load_detector_config()
+        self.session = create_session(model_path, self.config)
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+        # A symbolic or missing leading dimension means the model takes any batch size
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.supports_batch = not isinstance(batch_dim, int)
+        self._preprocessors = threading.local()
+
+    def preprocess(self, image):
+        preprocessor = getattr(self._preprocessors, "instance", None)
+        if preprocessor is None:
+            preprocessor = LetterboxPreprocessor(INPUT_SIZE, self.config["resample"])
+            self._preprocessors.instance = preprocessor
+        return preprocessor(image)
+
+    def run(self, tensor):
+        return self.session.run([self.output_name], {self.input_name: tensor})[0]
+
+    def predict(self, image):
+        """
+        Returns detections for a PIL image as a float32 (N, 6) array.
+        """
+        tensor, x_offset, y_offset, scale = self.preprocess(image)
+        return postprocess_detections(self.run(tensor), x_offset, y_offset, scale)
+
+    def predict_batch(self, images, max_batch_size=MAX_BATCH_SIZE):
+        """
+        Returns one detection array per image. Images are letterboxed into a
+        stacked (N, 3, S, S) tensor and run together when the model has a
+        dynamic batch dimension; otherwise they are run one at a time.
+        """
+        if not self.supports_batch:
+            return [self.predict(image) for image in images]
+
+        results = []
+        for start in range(0, len(images), max_batch_size):
+            chunk = images[start:start + max_batch_size]
+            batch = np.empty((len(chunk), 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+            letterboxes = []
+            for index, image in enumerate(chunk):
+                tensor, x_offset, y_offset, scale = self.preprocess(image)
+                batch[index] = tensor[0]
+                letterboxes.append((x_offset, y_offset, scale))
+
+            output = self.run(batch)
+            for index, (x_offset, y_offset, scale) in enumerate(letterboxes):
+                results.append(postprocess_detections(output[index], x_offset, y_offset, scale))
+        return results
+
+    def warm_up(self):
+        """
+        Runs one dummy inference so graph initialization is not paid by the first move.
+        """
+        self.run(np.zeros((1, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32))
+
+
+def resolve_model_path(filename=MODEL_FILENAME):
+    model_path = resource_path(filename)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(
+            f"Missing {filename} – please download and place it in the project root. "
+            f"See README for instructions: {README_URL}"
+        )
+    return model_path
+
+
+def select_model_path(config):
+    """
+    Returns the quantized model if prefer_quantized is set and it passed its
+    accuracy gate against the current float model, else the float model.
+    """
+    model_path = resolve_model_path()
+    if config["prefer_quantized"]:
+        quantized_path = resource_path(QUANTIZED_MODEL_FILENAME)
+        if gate_passed(quantized_path, model_path):
+            logger.info(f"Using quantized detector model {quantized_path}")
+            return quantized_path
+    return model_path
+
+
+# Lazily created singleton, loaded on a background thread
+_detector_future = None
+_detector_lock = threading.Lock()
+
+
+def _load_detector(future):
+    try:
+        logger.info("Loading piece detector in the background...")
+        config = load_detector_config()
+        detector = OnnxDetector(select_model_path(config), config)
+        detector.warm_up()
+        logger.info("Piece detector loaded and warmed up")
+        future.set_result(detector)
+    except Exception as e:
+        logger.error(f"Failed to load piece detector: {e}")
+        future.set_exception(e)
+
+
+def start_detector_loading():
+    """
+    Starts loading and warming up the detector on a daemon thread.
+    Safe to call more than once; returns the readiness future.
+    """
+    global _detector_future
+    with _detector_lock:
+        if _detector_future is None:
+            _detector_future = Future()
+            threading.Thread(target=_load_detector, args=(_detector_future,), daemon=True).start()
+        return _detector_future
+
+
+def detector_ready():
+    """
+    Returns the readiness future, starting the load if nobody has yet.
+    """
+    return start_detector_loading()
+
+
+def get_detector(timeout=None):
+    """
+    Returns the loaded detector, waiting for the background load if needed.
+    Raises the load error (e.g. FileNotFoundError) if loading failed.
+    """
+    return start_detector_loading().result(timeout)
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+
+INPUT_SIZE = 640
+DEFAULT_RESAMPLE = "lanczos"
+
+# Cheaper filters trade a little edge sharpness for a much faster resize
+RESAMPLE_FILTERS = {
+    "nearest": Image.NEAREST,
+    "box": Image.BOX,
+    "bilinear": Image.BILINEAR,
+    "hamming": Image.HAMMING,
+    "bicubic": Image.BICUBIC,
+    "lanczos": Image.LANCZOS,
+}
+
+
+# Input sizes whose letterbox geometry and gather indices are kept; ROI crop
+# sizes change with every re-seed, so older ones are evicted
+SIZE_CACHE_ENTRIES = 32
+
+
+# NumPy frames from screen capture are BGRA/BGRX (or BGR); these are their R, G, B channels
+FRAME_RGB_CHANNELS = (2, 1, 0)
+
+
+def frame_size(image):
+    """
+    Returns (width, height) of a PIL image or an (H, W, C) frame array.
+    """
+    if isinstance(image, np.ndarray):
+        return image.shape[1], image.shape[0]
+    return image.size
+
+
+def crop_frame(image, box):
+    """
+    Crops (left, top, right, bottom) from a PIL image, or as a view from a frame array.
+    """
+    if isinstance(image, np.ndarray):
+        left, top, right, bottom = (int(v) for v in box)
+        return image[max(0, top):bottom, max(0, left):right]
+    return image.crop(box)
+
+
+def frame_image(frame):
+    """
+    Wraps a BGRA (or BGR) frame array in an RGB PIL image.
+    """
+    height, width = frame.shape[:2]
+    if frame.shape[2] == 4:
+        return Image.frombuffer("RGB", (width, height), np.ascontiguousarray(frame), "raw", "BGRX", 0, 1)
+    return Image.fromarray(np.ascontiguousarray(frame[..., FRAME_RGB_CHANNELS]))
+
+
+def nearest_indices(source_length, target_length):
+    """
+    Source index sampled for each of target_length output pixels (pixel-centre aligned).
+    """
+    indices = ((np.arange(target_length) + 0.5) * (source_length / target_length)).astype(np.intp)
+    return np.minimum(indices, source_length - 1)
+
+
+def resolve_resample(name):
+    """
+    Maps a filter name from RESAMPLE_FILTERS to the PIL constant.
+    """
+    try:
+        return RESAMPLE_FILTERS[str(name).lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown resample filter '{name}'. Choose one of: {', '.join(RESAMPLE_FILTERS)}"
+        )
+
+
+def letterbox_geometry(orig_w, orig_h, target_size=INPUT_SIZE):
+    """
+    Returns (new_w, new_h, x_offset, y_offset, scale) for fitting an image of the
+    given size into a target_size square while keeping the aspect ratio.
+    """
+    scale = min(target_size / orig_w, target_size / orig_h)
+    new_w = int(orig_w * scale)
+    new_h = int(orig_h * scale)
+    x_offset = (target_size - new_w) // 2
+    y_offset = (target_size - new_h) // 2
+    return new_w, new_h, x_offset, y_offset, scale
+
+
+def letterbox_resize(image, target_size, resample=DEFAULT_RESAMPLE):
+    """
+    Resizes the image to fit within the target_size, maintaining the aspect ratio.
+    Adds padding only to one dimension (either top/bottom or left/right) to make the image square.
+    """
+    new_w, new_h, x_offset, y_offset, scale = letterbox_geometry(*image.size, target_size)
+
+    resized = image.resize((new_w, new_h), resolve_resample(resample))
+
+    padded = Image.new("RGB", (target_size, target_size), (0, 0, 0))
+    padded.paste(resized, (x_offset, y_offset))
+
+    return padded, x_offset, y_offset, scale
+
+
+class LetterboxPreprocessor:
+    """
+    Letterboxes images straight into a preallocated 1x3xSxS float32 tensor.
+
+    The letterbox geometry is cached for the SIZE_CACHE_ENTRIES most recent
+    input sizes and the padding is only cleared when the input size changes.
+    The returned tensor is reused on every call, so it must be consumed (e.g.
+    by session.run) before the next one.
+
+    With the nearest filter, frame arrays from screen capture skip PIL
+    entirely: they are resized with an index gather and the BGRA -> RGB
+    swizzle happens while normalizing into the tensor. Other filters wrap the
+    frame in a PIL image so it is resized with the configured filter.
+    """
+
+    def __init__(self, target_size=INPUT_SIZE, resample=DEFAULT_RESAMPLE):
+        self.target_size = target_size
+        self.resample = resolve_resample(resample)
+        self.tensor = np.zeros((1, 3, target_size, target_size), dtype=np.float32)
+        self._geometry_cache = OrderedDict()
+        self._index_cache = OrderedDict()
+        self._active_size = None
+
+    @staticmethod
+    def _cached(cache, key, build):
+        """Returns cache[key], building it on a miss and evicting the least recently used."""
+        value = cache.get(key)
+        if value is None:
+            value = cache[key] = build()
+            if len(cache) > SIZE_CACHE_ENTRIES:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return value
+
+    def geometry(self, orig_w, orig_h):
+        return self._cached(self._geometry_cache, (orig_w, orig_h),
+                            lambda: letterbox_geometry(orig_w, orig_h, self.target_size))
+
+    def _target_region(self, size):
+        new_w, new_h, x_offset, y_offset, scale = self.geometry(*size)
+        if size != self._active_size:
+            # A different letterbox leaves stale pixels in the padding area
+            self.tensor.fill(0.0)
+            self._active_size = size
+        region = self.tensor[0, :, y_offset:y_offset + new_h, x_offset:x_offset + new_w]
+        return region, (new_w, new_h), x_offset, y_offset, scale
+
+    def _frame_indices(self, size, new_size):
+        def build():
+            rows = nearest_indices(size[1], new_size[1])
+            cols = nearest_indices(size[0], new_size[0])
+            return rows[:, None], cols[None, :]
+        return self._cached(self._index_cache, (size, new_size), build)
+
+    def _from_frame(self, frame):
+        size = frame_size(frame)
+        if self.resample != Image.NEAREST:
+            return self._from_image(frame_image(frame))
+        region, new_size, x_offset, y_offset, scale = self._target_region(size)
+
+        rows, cols = self._frame_indices(size, new_size)
+        sampled = frame[rows, cols]  # (new_h, new_w, C) in one gather
+        for channel, source in enumerate(FRAME_RGB_CHANNELS):
+            np.divide(sampled[..., source], np.float32(255.0), out=region[channel])
+        return self.tensor, x_offset, y_offset, scale
+
+    def __call__(self, image):
+        """
+        Returns (tensor, x_offset, y_offset, scale) for a PIL image or a BGRA frame array.
+        """
+        if isinstance(image, np.ndarray):
+            return self._from_frame(image)
+        return self._from_image(image)
+
+    def _from_image(self, image):
+        region, new_size, x_offset, y_offset, scale = self._target_region(image.size)
+
+        resized = image.resize(new_size, self.resample)
+        if resized.mode != "RGB":
+            resized = resized.convert("RGB")
+
+        # HWC uint8 -> CHW float32 in [0, 1], written in place
+        pixels = np.asarray(resized).transpose(2, 0, 1)
+        np.divide(pixels, np.float32(255.0), out=region)
+        return self.tensor, x_offset, y_offset, scale
@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import glob
+import hashlib
+import argparse
+import logging
+from PIL import Image
+from .preprocess import INPUT_SIZE, LetterboxPreprocessor
+from .detections import detections_to_list
+from .fen_extractor import boxes_to_grid, grid_to_fen
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+QUANTIZATION_MODES = ("dynamic", "static")
+
+
+def gate_report_path(quantized_path):
+    """The accuracy gate report is stored next to the quantized model."""
+    return os.path.splitext(quantized_path)[0] + ".gate.json"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def gate_passed(quantized_path, float_path):
+    """
+    True if quantized_path has a passing gate report that was produced from
+    the float model currently at float_path, for the quantized model
+    currently at quantized_path.
+    """
+    report_path = gate_report_path(quantized_path)
+    if not (os.path.exists(quantized_path) and os.path.exists(report_path)):
+        return False
+    try:
+        with open(report_path, "r") as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable quantization gate report {report_path}: {e}")
+        return False
+    if not report.get("passed"):
+        logger.info("Quantized detector model did not pass its accuracy gate; using float model")
+        return False
+    if report.get("source_sha256") != file_sha256(float_path):
+        logger.info("Quantized detector model was built from a different float model; using float model")
+        return False
+    if report.get("quantized_sha256") != file_sha256(quantized_path):
+        logger.info("Quantized detector model changed since its accuracy gate ran; using float model")
+        return False
+    return True
+
+
+def load_images(folder):
+    """
+    Returns a sorted list of (path, RGB PIL image) for PNG/JPEG files in folder.
+    """
+    paths = []
+    for pattern in ("*.png", "*.jpg", "*.jpeg"):
+        paths.extend(glob.glob(os.path.join(folder, pattern)))
+    return [(path, Image.open(path).convert("RGB")) for path in sorted(paths)]
+
+
+def read_label(image_path):
+    """
+    Returns the placement label for a screenshot, read from a `.fen` file with
+    the same name, or None. The label is the FEN placement field as the board
+    appears on screen (top row first), whichever colour is at the bottom.
+    """
+    label_path = os.path.splitext(image_path)[0] + ".fen"
+    if not os.path.exists(label_path):
+        return None
+    with open(label_path, "r") as f:
+        text = f.read().strip()
+    return text.split()[0] if text else None
+
+
+def screen_placement(detector, image):
+    """
+    Runs the detector and returns the on-screen placement field, or None.
+    """
+    boxes = detections_to_list(detector.predict(image))
+    result = boxes_to_grid(boxes) if boxes else None
+    if result is None:
+        return None
+    return grid_to_fen(result[3], "w").split()[0]
+
+
+def _calibration_reader(images, input_name):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class ScreenshotCalibrationReader(CalibrationDataReader):
+        """Feeds letterboxed screenshots to the static quantization calibrator."""
+
+        def __init__(self):
+            self.preprocessor = LetterboxPreprocessor(INPUT_SIZE)
+            self.images = iter(images)
+
+        def get_next(self):
+            image = next(self.images, None)
+            if image is None:
+                return None
+            tensor = self.preprocessor(image)[0]
+            return {input_name: tensor.copy()}
+
+    return ScreenshotCalibrationReader()
+
+
+def quantize_model(float_path, quantized_path, mode="dynamic", calibration_images=None):
+    """
+    Writes an INT8 copy of the detector. Static mode calibrates activation
+    ranges on calibration_images; dynamic mode only needs the weights.
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, QuantFormat, quantize_dynamic, quantize_static
+
+    if mode == "dynamic":
+        quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QUInt8)
+    elif mode == "static":
+        if not calibration_images:
+            raise ValueError("static quantization needs calibration screenshots")
+        input_name = ort.InferenceSession(float_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        quantize_static(
+            float_path, quantized_path, _calibration_reader(calibration_images, input_name),
+            quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        )
+    else:
+        raise ValueError(f"expected one of {', '.join(QUANTIZATION_MODES)}")
+    logger.info(f"Wrote {mode} quantized detector to {quantized_path}")
+
+
+def evaluate_gate(float_detector, quantized_detector, labelled, max_accuracy_drop=0.0):
+    """
+    Compares placement accuracy of both models on (path, image) pairs.
+    Screenshots without a `.fen` label are scored against the float model.
+    Returns the gate report dict.
+    """
+    total = float_correct = quantized_correct = labelled_count = 0
+    mismatches = []
+    for path, image in labelled:
+        expected = read_label(path)
+        float_placement = screen_placement(float_detector, image)
+        quantized_placement = screen_placement(quantized_detector, image)
+        if expected is None:
+            if float_placement is None:
+                logger.warning(f"Skipping {path}: no label and the float model found no board")
+                continue
+            expected = float_placement
+        else:
+            labelled_count += 1
+        total += 1
+        float_correct += float_placement == expected
+        quantized_correct += quantized_placement == expected
+        if quantized_placement != expected:
+            mismatches.append(os.path.basename(path))
+
+    float_accuracy = float_correct / total if total else 0.0
+    quantized_accuracy = quantized_correct / total if total else 0.0
+    return {
+        "samples": total,
+        "labelled_samples": labelled_count,
+        "float_accuracy": float_accuracy,
+        "quantized_accuracy": quantized_accuracy,
+        "max_accuracy_drop": max_accuracy_drop,
+        "passed": total > 0 and quantized_accuracy >= float_accuracy - max_accuracy_drop,
+        "mismatches": mismatches,
+    }
+
+
+def run_quantize(argv=None):
+    """
+    Entry point for `--quantize-detector`: builds the quantized model, runs
+    the accuracy gate and writes the gate report the runtime checks.
+    """
+    from .onnx_detector import OnnxDetector, MODEL_FILENAME, QUANTIZED_MODEL_FILENAME
+    from .detector_config import load_detector_config
+
+    parser = argparse.ArgumentParser(description="Quantize the piece detector with an accuracy gate")
+    parser.add_argument("--quantize-detector", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--model", default=MODEL_FILENAME, help="Float ONNX model")
+    parser.add_argument("--output", default=None, help="Quantized model path (default: next to --model)")
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, default="static")
+    parser.add_argument("--calibration", default=None, help="Folder of screenshots for static calibration")
+    parser.add_argument("--labelled", required=True, help="Folder of screenshots (with optional .fen labels) for the gate")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0)
+    args, _ = parser.parse_known_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"Model not found: {args.model}")
+        return 1
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.model)), QUANTIZED_MODEL_FILENAME)
+    labelled = load_images(args.labelled)
+    if not labelled:
+        print(f"No screenshots found in {args.labelled}")
+        return 1
+
+    calibration = None
+    if args.mode == "static":
+        calibration = [image for _, image in load_images(args.calibration or args.labelled)]
+
+    # A stale report must not vouch for the model about to be overwritten
+    report_path = gate_report_path(output)
+    if os.path.exists(report_path):
+        os.remove(report_path)
+
+    try:
+        quantize_model(args.model, output, args.mode, calibration)
+    except ImportError as e:
+        print(f"Quantization needs the 'onnx' package ({e}); install it with: pip install onnx")
+        return 1
+
+    config = load_detector_config()
+    config["optimized_model_path"] = ""
+    report = evaluate_gate(OnnxDetector(args.model, config), OnnxDetector(output, config),
+                           labelled, args.max_accuracy_drop)
+    report.update(mode=args.mode, source_sha256=file_sha256(args.model), quantized_sha256=file_sha256(output))
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Float accuracy:     {report['float_accuracy']:.1%} on {report['samples']} screenshot(s) "
+          f"({report['labelled_samples']} labelled)")
+    print(f"Quantized accuracy: {report['quantized_accuracy']:.1%}")
+    print("Gate passed; the quantized model will be used" if report["passed"]
+          else f"Gate failed on: {', '.join(report['mismatches'])}")
+    return 0 if report["passed"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(run_quantize(sys.argv[1:]))
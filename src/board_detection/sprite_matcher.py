@@ -0,0 +1,223 @@
+import logging
+import threading
+import numpy as np
+from .fen_extractor import CLASS_TO_FEN, boxes_to_grid
+from .square_cache import board_pixels
+from .detections import BOARD_CLASS_ID
+from .preprocess import frame_size
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+FEN_TO_CLASS = {fen: class_id for class_id, fen in CLASS_TO_FEN.items()}
+
+# Tiles are compared at this resolution (per side)
+TILE_PIXELS = 16
+
+
+def tile_features(image, board_x, board_y, square_size):
+    """
+    Returns a (64, TILE_PIXELS * TILE_PIXELS * 3) float32 array, one row per
+    square in screen order, built from a single area-averaged sample of the board.
+    """
+    pixels = board_pixels(image, (board_x, board_y, square_size), 8 * TILE_PIXELS).astype(np.float32)
+    tiles = pixels.reshape(8, TILE_PIXELS, 8, TILE_PIXELS, 3).transpose(0, 2, 1, 3, 4)
+    return tiles.reshape(64, -1)
+
+
+def _square_parity():
+    # Screen (0, 0) is a8 when playing white and h1 when playing black; both are light squares
+    return np.array([(index // 8 + index % 8) % 2 for index in range(64)])
+
+
+SQUARE_PARITY = _square_parity()
+
+
+def theme_key(features):
+    """
+    Identifies the board theme from the median corner colour of light and dark
+    squares. Corners are background on nearly every tile, pieces or not.
+    """
+    corners = features.reshape(64, TILE_PIXELS, TILE_PIXELS, 3)[:, 1, 1, :]
+    light = np.median(corners[SQUARE_PARITY == 0], axis=0)
+    dark = np.median(corners[SQUARE_PARITY == 1], axis=0)
+    return tuple((np.concatenate([light, dark]).astype(np.int32) >> 4).tolist())
+
+
+class SpriteSet:
+    """
+    Sprite templates for one board theme, keyed by (piece, square parity).
+    Pieces are FEN characters; None is an empty square.
+    """
+
+    def __init__(self, max_samples=6, novelty_rms=0.04):
+        self.max_samples = max_samples
+        self.novelty_rms = novelty_rms
+        self.samples = {}
+        self._matrix = None
+        self._labels = None
+        self._parities = None
+
+    def add(self, piece, parity, feature):
+        samples = self.samples.setdefault((piece, parity), [])
+        if samples:
+            rms = np.sqrt(np.min([np.mean((feature - s) ** 2) for s in samples])) / 255.0
+            if rms < self.novelty_rms:
+                return  # Already well represented
+            if len(samples) >= self.max_samples:
+                samples.pop(0)
+        samples.append(feature)
+        self._matrix = None
+
+    def _compile(self):
+        features, labels, parities = [], [], []
+        for (piece, parity), samples in self.samples.items():
+            for sample in samples:
+                features.append(sample)
+                labels.append(piece)
+                parities.append(parity)
+        self._matrix = np.stack(features)
+        self._labels = labels
+        self._parities = np.array(parities)
+
+    def match(self, features):
+        """
+        Returns (labels, rms, margin) per tile. rms is the normalized distance
+        to the best template; margin is best / second-best distance over
+        templates of a different piece (lower is more certain).
+        """
+        if self._matrix is None:
+            self._compile()
+        templates = self._matrix
+        # Squared distances for every tile/template pair in one matrix product
+        distances = (
+            np.sum(features ** 2, axis=1)[:, None]
+            - 2.0 * features @ templates.T
+            + np.sum(templates ** 2, axis=1)[None, :]
+        )
+        np.maximum(distances, 0.0, out=distances)
+        # Sprites only match on the same square colour
+        distances[SQUARE_PARITY[:, None] != self._parities[None, :]] = np.inf
+
+        best = np.argmin(distances, axis=1)
+        best_distance = distances[np.arange(64), best]
+        labels = [self._labels[index] for index in best]
+
+        label_array = np.array([str(label) for label in self._labels])
+        other = label_array[None, :] != label_array[best][:, None]
+        second = np.where(other, distances, np.inf).min(axis=1)
+        margin = np.where(np.isfinite(second), best_distance / np.maximum(second, 1e-6), 0.0)
+
+        rms = np.sqrt(best_distance / features.shape[1]) / 255.0
+        return labels, rms, margin
+
+
+class SpriteMatcher:
+    """
+    Fast detection backend that classifies the 64 squares by matching them
+    against piece sprites harvested from earlier confident ONNX detections.
+
+    Call it like get_positions(image, origin). It needs the board location
+    (kept in full-screenshot coordinates) and a sprite set for the current
+    theme. It falls back to the ONNX detector (and harvests from it) whenever
+    a square cannot be matched confidently.
+    """
+
+    def __init__(self, fallback, harvest_confidence=0.85, max_rms=0.08, max_margin=0.6):
+        self.fallback = fallback
+        self.harvest_confidence = harvest_confidence
+        self.max_rms = max_rms
+        self.max_margin = max_margin
+        self.board = None  # (x, y, square_size)
+        self.themes = {}
+        self.counters = {"frames": 0, "matched": 0, "fallbacks": 0}
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        frames = stats["frames"] or 1
+        stats["match_rate"] = stats["matched"] / frames
+        return stats
+
+    def harvest(self, image, boxes, origin=(0, 0)):
+        """
+        Learns sprites from a detector result (boxes in full-screenshot
+        coordinates, image at origin). Squares whose label depends on a
+        low-confidence detection are skipped.
+        """
+        if not boxes:
+            return
+        result = boxes_to_grid(boxes)
+        if result is None:
+            return
+        board_x, board_y, square_size, grid = result
+        confident = [box for box in boxes if box[4] >= self.harvest_confidence or box[5] == BOARD_CLASS_ID]
+        _, _, _, confident_grid = boxes_to_grid(confident)
+
+        features = tile_features(image, board_x - origin[0], board_y - origin[1], square_size)
+        key = theme_key(features)
+
+        with self._lock:
+            self.board = (board_x, board_y, square_size)
+            sprites = self.themes.setdefault(key, SpriteSet())
+            for index in range(64):
+                row, col = divmod(index, 8)
+                piece = grid[row][col]
+                if piece != '?' and piece == confident_grid[row][col]:
+                    sprites.add(piece, int(SQUARE_PARITY[index]), features[index])
+
+    def _boxes_from_labels(self, labels, rms):
+        board_x, board_y, square_size = self.board
+        boxes = [[board_x, board_y, square_size * 8, square_size * 8, 1.0, BOARD_CLASS_ID]]
+        for index, piece in enumerate(labels):
+            if piece is None:
+                continue
+            row, col = divmod(index, 8)
+            confidence = float(max(0.0, 1.0 - rms[index]))
+            boxes.append([board_x + col * square_size, board_y + row * square_size,
+                          square_size, square_size, confidence, float(FEN_TO_CLASS[piece])])
+        return boxes
+
+    def match(self, image, origin=(0, 0)):
+        """
+        Returns boxes in get_positions format, or None if any square is uncertain.
+        """
+        with self._lock:
+            board = self.board
+        if board is None:
+            return None
+
+        board_x, board_y, square_size = board
+        board_x, board_y = board_x - origin[0], board_y - origin[1]
+        width, height = frame_size(image)
+        if board_x < 0 or board_y < 0 or board_x + 8 * square_size > width or board_y + 8 * square_size > height:
+            return None  # The board is not (wholly) in this image
+        features = tile_features(image, board_x, board_y, square_size)
+        with self._lock:
+            sprites = self.themes.get(theme_key(features))
+            if sprites is None:
+                return None
+            labels, rms, margin = sprites.match(features)
+
+        if np.any(rms > self.max_rms) or np.any(margin > self.max_margin):
+            return None
+        return self._boxes_from_labels(labels, rms)
+
+    def __call__(self, image, origin=(0, 0)):
+        with self._lock:
+            self.counters["frames"] += 1
+
+        boxes = self.match(image, origin)
+        if boxes is not None:
+            with self._lock:
+                self.counters["matched"] += 1
+            return boxes
+
+        logger.debug("Sprite match uncertain; running the ONNX detector")
+        with self._lock:
+            self.counters["fallbacks"] += 1
+        boxes = self.fallback(image, origin)
+        self.harvest(image, boxes, origin)
+        return boxes
@@ -0,0 +1,231 @@
+import logging
+import threading
+import numpy as np
+from .fen_extractor import boxes_to_grid
+from .preprocess import FRAME_RGB_CHANNELS, crop_frame, nearest_indices
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Marks a tile hash that was seen with more than one piece
+_AMBIGUOUS = object()
+
+
+def geometry_from_positions(board_positions):
+    """
+    Recovers (board_x, board_y, square_size) from the square centres written
+    by store_board_positions. Returns None if the positions are not stored yet.
+    """
+    try:
+        first_x, first_y = board_positions[(0, 0)]
+        next_x, _ = board_positions[(1, 0)]
+    except (KeyError, TypeError):
+        return None
+    square_size = next_x - first_x
+    if square_size <= 0:
+        return None
+    return first_x - square_size // 2, first_y - square_size // 2, square_size
+
+
+def board_pixels(image, geometry, side, samples=4):
+    """
+    Returns the board area of a PIL image or BGRA frame array resampled to a
+    (side, side, 3) RGB uint8 array. Each output pixel averages a
+    samples x samples grid, which keeps the result stable under small noise.
+    """
+    x, y, square_size = geometry
+    box = (int(x), int(y), int(x + 8 * square_size), int(y + 8 * square_size))
+    board = crop_frame(image, box)
+    if isinstance(board, np.ndarray):
+        channels = list(FRAME_RGB_CHANNELS)
+    else:
+        board = np.asarray(board.convert("RGB"))
+        channels = [0, 1, 2]
+
+    height, width = board.shape[:2]
+    rows = nearest_indices(height, side * samples)
+    cols = nearest_indices(width, side * samples)
+    sampled = board[rows[:, None], cols[None, :]][..., channels]
+    return sampled.reshape(side, samples, side, samples, 3).mean(axis=(1, 3)).astype(np.uint8)
+
+
+def tile_hashes(image, geometry, tile_pixels=8, quantize_shift=2):
+    """
+    Returns 64 hashes, one per square in screen order (row-major from the top left).
+    Each square is area-averaged down to tile_pixels x tile_pixels and the low
+    bits are dropped so tiny rendering noise does not change the hash.
+    """
+    pixels = board_pixels(image, geometry, 8 * tile_pixels) >> quantize_shift
+    tiles = pixels.reshape(8, tile_pixels, 8, tile_pixels, 3).transpose(0, 2, 1, 3, 4).reshape(64, -1)
+    return [hash(tile.tobytes()) for tile in tiles]
+
+
+def frame_signature(image, geometry, samples_per_square=16):
+    """
+    Returns a strided checksum of the board area of a PIL image or frame
+    array. Only every few pixels are read, enough to see any piece or
+    highlight change, so it is far cheaper than tile_hashes.
+    """
+    x, y, square_size = geometry
+    box = (int(x), int(y), int(x + 8 * square_size), int(y + 8 * square_size))
+    board = crop_frame(image, box)
+    if not isinstance(board, np.ndarray):
+        board = np.asarray(board)
+    step = max(1, int(square_size) // samples_per_square)
+    return hash((box, np.ascontiguousarray(board[::step, ::step]).tobytes()))
+
+
+class FrameDeduper:
+    """
+    Remembers the result read from the last board frame. A frame whose
+    frame_signature matches the previous one gets that result back without
+    any detection or tile hashing.
+    """
+
+    def __init__(self, samples_per_square=16):
+        self.samples_per_square = samples_per_square
+        self.signature = None
+        self.result = None
+        self.counters = {"frames": 0, "hits": 0}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.signature = None
+            self.result = None
+
+    def lookup(self, image, geometry):
+        """
+        Returns (signature, cached result). The result is None unless the
+        frame is unchanged since the last store().
+        """
+        signature = frame_signature(image, geometry, self.samples_per_square)
+        with self._lock:
+            self.counters["frames"] += 1
+            if self.result is not None and signature == self.signature:
+                self.counters["hits"] += 1
+                return signature, self.result
+        return signature, None
+
+    def store(self, signature, result):
+        with self._lock:
+            self.signature, self.result = signature, result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["hit_rate"] = stats["hits"] / (stats["frames"] or 1)
+        return stats
+
+
+class SquareTileCache:
+    """
+    Keeps the piece on each of the 64 squares keyed by a cheap hash of its tile.
+
+    Each frame only the squares whose tile hash changed are re-classified,
+    by looking the new hash up in a memo learned from earlier detector runs.
+    The full detector only runs when a changed tile has never been seen.
+    """
+
+    def __init__(self, geometry_tolerance=3.0):
+        self.geometry_tolerance = geometry_tolerance
+        self.geometry = None
+        self.hashes = None
+        self.grid = None
+        self.memo = {}
+        self.counters = {"frames": 0, "unchanged": 0, "incremental": 0, "detector_runs": 0}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.geometry = None
+            self.hashes = None
+            self.grid = None
+            self.memo.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        frames = stats["frames"] or 1
+        stats["detector_run_rate"] = stats["detector_runs"] / frames
+        return stats
+
+    def _matches_geometry(self, board_x, board_y, square_size, geometry):
+        x, y, size = geometry
+        tolerance = self.geometry_tolerance
+        return (abs(board_x - x) <= tolerance and abs(board_y - y) <= tolerance
+                and abs(square_size - size) <= tolerance)
+
+    def _learn(self, hashes, grid):
+        for index, tile_hash in enumerate(hashes):
+            piece = grid[index // 8][index % 8]
+            known = self.memo.get(tile_hash, piece)
+            self.memo[tile_hash] = piece if known == piece else _AMBIGUOUS
+
+    def _incremental(self, hashes):
+        """
+        Applies memo lookups for the changed squares. Returns False on any miss.
+        """
+        changed = [i for i, tile_hash in enumerate(hashes) if tile_hash != self.hashes[i]]
+        if not changed:
+            self.counters["unchanged"] += 1
+            return True
+
+        pieces = []
+        for index in changed:
+            piece = self.memo.get(hashes[index], _AMBIGUOUS)
+            if piece is _AMBIGUOUS:
+                return False
+            pieces.append(piece)
+
+        for index, piece in zip(changed, pieces):
+            self.grid[index // 8][index % 8] = piece
+        self.hashes = hashes
+        self.counters["incremental"] += 1
+        logger.debug(f"Re-classified {len(changed)} square(s) from tile cache")
+        return True
+
+    def classify(self, image, board_positions, detect, origin=(0, 0)):
+        """
+        Returns the screen-oriented 8x8 grid for `image`, or None if the board
+        could not be read. `detect` is called (with no arguments) to get fresh
+        detector boxes when the cache cannot answer on its own.
+
+        `origin` is where the image's top-left corner sits in full-screenshot
+        coordinates, for images that are a captured region of the screen.
+        Boxes from `detect` are expected in full-screenshot coordinates.
+        """
+        geometry = geometry_from_positions(board_positions)
+        if geometry is None:
+            return None
+
+        local_geometry = (geometry[0] - origin[0], geometry[1] - origin[1], geometry[2])
+        hashes = tile_hashes(image, local_geometry)
+        with self._lock:
+            self.counters["frames"] += 1
+            if geometry != self.geometry:
+                self.geometry, self.hashes, self.grid = geometry, None, None
+                self.memo.clear()
+            if self.grid is not None and self._incremental(hashes):
+                return [row[:] for row in self.grid]
+
+        with self._lock:
+            self.counters["detector_runs"] += 1
+        boxes = detect()
+        if not boxes:
+            return None
+        result = boxes_to_grid(boxes)
+        if result is None:
+            return None
+        board_x, board_y, square_size, grid = result
+
+        with self._lock:
+            if self._matches_geometry(board_x, board_y, square_size, geometry):
+                self._learn(hashes, grid)
+                self.hashes, self.grid = hashes, [row[:] for row in grid]
+            else:
+                # Board moved since positions were stored; tiles would be misread
+                logger.debug("Detected board does not match stored geometry; not caching tiles")
+                self.hashes, self.grid = None, None
+        return grid
@@ -9,6 +9,19 @@ class AppConfig:
     DEFAULT_SCREENSHOT_DELAY = 0.4
     DEFAULT_MOVE_MODE = "drag"
 
+    # Keep the engine searching the expected reply while the opponent thinks
+    ENGINE_PONDER = True
+
+    # Search limits: "depth" (slider), "movetime", "nodes" or "clock"
+    DEFAULT_SEARCH_MODE = "depth"
+    DEFAULT_MOVETIME_MS = 1000
+    DEFAULT_SEARCH_NODES = 2000000
+    DEFAULT_CLOCK_SECONDS = 180
+    DEFAULT_CLOCK_INCREMENT = 2
+
+    # Hard ceiling on one search in seconds; the engine is stopped and its best move so far played
+    MAX_MOVE_LATENCY = 10.0
+
     WINDOW_TITLE = "ChessPilot"
     WINDOW_WIDTH = 350
-    WINDOW_HEIGHT = 380
+    WINDOW_HEIGHT = 410
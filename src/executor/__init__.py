@@ -14,6 +14,7 @@ from .auto_move import auto_move_loop
 from .get_best_move import get_best_move, cleanup_stockfish, initialize_stockfish_at_startup
 from .get_current_fen import get_current_fen
 from .is_two_square_king_move import is_two_square_king_move
+from .apply_move_to_fen import apply_move_to_fen
 
 __all__ = [
     "capture_screenshot_in_memory",
@@ -32,6 +33,7 @@ __all__ = [
     "get_best_move",
     "get_current_fen",
     "is_two_square_king_move",
+    "apply_move_to_fen",
     "cleanup_stockfish",
     "initialize_stockfish_at_startup",
 ]
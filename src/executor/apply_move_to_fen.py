@@ -0,0 +1,128 @@
+import logging
+from executor.expend_fen_row import expend_fen_row
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+FILES = "abcdefgh"
+
+# Castling right lost when a piece leaves or is captured on these squares
+CASTLING_SQUARES = {
+    "e1": "KQ", "h1": "K", "a1": "Q",
+    "e8": "kq", "h8": "k", "a8": "q",
+}
+
+# Rook hop for each castling king move
+CASTLING_ROOKS = {
+    "e1g1": ("h1", "f1"), "e1c1": ("a1", "d1"),
+    "e8g8": ("h8", "f8"), "e8c8": ("a8", "d8"),
+}
+
+
+def _square_index(square):
+    """Returns (row, col) of an algebraic square; row 0 is rank 8."""
+    if len(square) != 2 or square[0] not in FILES or square[1] not in "12345678":
+        raise ValueError(f"Invalid square: {square}")
+    return 8 - int(square[1]), FILES.index(square[0])
+
+
+def _parse_board(placement):
+    rows = placement.split("/")
+    if len(rows) != 8:
+        raise ValueError(f"Invalid piece placement: {placement}")
+    board = [list(expend_fen_row(row)) for row in rows]
+    if any(len(row) != 8 for row in board):
+        raise ValueError(f"Invalid piece placement: {placement}")
+    return board
+
+
+def _board_placement(board):
+    rows = []
+    for row in board:
+        text, empty = "", 0
+        for piece in row:
+            if piece == " ":
+                empty += 1
+                continue
+            if empty:
+                text += str(empty)
+                empty = 0
+            text += piece
+        rows.append(text + (str(empty) if empty else ""))
+    return "/".join(rows)
+
+
+def _en_passant_square(board, piece, from_row, to_row, col):
+    """
+    Square behind a double pawn push, written only when an enemy pawn stands
+    next to it (as Stockfish does), else "-".
+    """
+    if piece.lower() != "p" or abs(to_row - from_row) != 2:
+        return "-"
+    enemy = "p" if piece == "P" else "P"
+    if not any(0 <= c < 8 and board[to_row][c] == enemy for c in (col - 1, col + 1)):
+        return "-"
+    return f"{FILES[col]}{8 - (from_row + to_row) // 2}"
+
+
+def apply_move_to_fen(fen, move):
+    """
+    Plays a UCI move (e.g. "e2e4", "e1g1", "e7e8q") on a FEN and returns the
+    resulting FEN: castling rook hop, en passant capture, promotion, castling
+    rights, en passant square and half/full-move counters. The move is trusted
+    to be legal (it comes from the engine); a malformed FEN or a move from an
+    empty square raises ValueError.
+    """
+    fields = fen.split()
+    if len(fields) < 4 or len(move) not in (4, 5):
+        raise ValueError(f"Cannot apply move {move} to FEN: {fen}")
+    placement, active, castling, en_passant = fields[:4]
+    halfmove = int(fields[4]) if len(fields) > 4 else 0
+    fullmove = int(fields[5]) if len(fields) > 5 else 1
+
+    board = _parse_board(placement)
+    from_square, to_square = move[:2], move[2:4]
+    from_row, from_col = _square_index(from_square)
+    to_row, to_col = _square_index(to_square)
+    piece = board[from_row][from_col]
+    if piece == " ":
+        raise ValueError(f"No piece on {from_square} in FEN: {fen}")
+
+    captured = board[to_row][to_col] != " "
+    board[from_row][from_col] = " "
+
+    if piece.lower() == "p" and to_square == en_passant and not captured:
+        board[from_row][to_col] = " "  # The captured pawn sits beside the mover
+        captured = True
+    if piece.lower() == "k" and move[:4] in CASTLING_ROOKS:
+        rook_from, rook_to = CASTLING_ROOKS[move[:4]]
+        rook_row, rook_col = _square_index(rook_from)
+        rook = board[rook_row][rook_col]
+        board[rook_row][rook_col] = " "
+        board[rook_row][_square_index(rook_to)[1]] = rook
+
+    if len(move) == 5:
+        promotion = move[4].lower()
+        if promotion not in "qrbn":
+            raise ValueError(f"Invalid promotion piece in move: {move}")
+        piece = promotion.upper() if piece.isupper() else promotion
+    board[to_row][to_col] = piece
+
+    for square in (from_square, to_square):
+        for right in CASTLING_SQUARES.get(square, ""):
+            castling = castling.replace(right, "")
+
+    next_en_passant = _en_passant_square(board, piece, from_row, to_row, from_col)
+    halfmove = 0 if captured or piece.lower() == "p" or len(move) == 5 else halfmove + 1
+    if active == "b":
+        fullmove += 1
+
+    return " ".join([
+        _board_placement(board),
+        "b" if active == "w" else "w",
+        castling or "-",
+        next_en_passant,
+        str(halfmove),
+        str(fullmove),
+    ])
@@ -1,16 +1,27 @@
 import time
 import threading
 import logging
+from PyQt6.QtCore import QTimer
 
 from board_detection import get_positions, get_fen_from_position
+from board_detection.detector_config import load_detector_config
 from executor.capture_screenshot_in_memory import capture_screenshot_in_memory
+from executor.screen_capture import screen_capture
+from executor.frame_pipeline import FramePipeline, square_cache, frame_deduper
 from executor.process_move import process_move
+from executor.get_best_move import stop_pondering
 from executor.processing_sync import processing_event
+from executor.settle import wait_for_settle
+from executor.delay_calibration import delay_calibrator
+from services.search_policy import search_policy
 
 # Logger setup
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Log the pipeline and cache counters every this many positions
+STATS_LOG_INTERVAL = 100
+
 def process_move_thread(
     root,
     color_indicator,
@@ -71,15 +82,18 @@ def auto_move_loop(
     opp_color = 'b' if color_indicator == 'w' else 'w'
     logger.info(f"Player color: {color_indicator}, Opponent color: {opp_color}")
 
-    # Initialize with seed position
-    _perform_initial_seeding(root, auto_mode_var, color_indicator, last_fen_by_color)
-    
-    # Main processing loop
-    _run_move_detection_loop(
-        root, color_indicator, opp_color, auto_mode_var, btn_play, move_mode,
-        board_positions, last_fen_by_color, screenshot_delay_var,
-        update_status_callback, kingside_var, queenside_var, update_last_fen_for_color
-    )
+    try:
+        # Initialize with seed position
+        _perform_initial_seeding(root, auto_mode_var, color_indicator, last_fen_by_color)
+
+        # Main processing loop
+        _run_move_detection_loop(
+            root, color_indicator, opp_color, auto_mode_var, btn_play, move_mode,
+            board_positions, last_fen_by_color, screenshot_delay_var,
+            update_status_callback, kingside_var, queenside_var, update_last_fen_for_color
+        )
+    finally:
+        screen_capture.close()  # Grabbers are per thread; this one ends with the loop
     
     logger.info("Exiting auto_move_loop")
 
@@ -142,40 +156,76 @@ def _run_move_detection_loop(
     update_status_callback, kingside_var, queenside_var, update_last_fen_for_color
 ):
     """
-    Main loop that continuously checks for moves and processes them.
+    Main loop that consumes board positions from the frame pipeline and processes moves.
     """
-    while auto_mode_var.get():
-        logger.debug("Loop tick")
-        
-        if not _should_continue_processing(board_positions):
-            continue
-            
-        try:
-            current_position = _capture_current_position(root, auto_mode_var, color_indicator)
-            if not current_position:
-                continue
-                
-            placement, active = current_position
-            
-            if active == opp_color:
-                _handle_opponent_turn(opp_color, placement, last_fen_by_color)
+    pipeline = _start_pipeline(root, auto_mode_var, color_indicator, board_positions)
+    positions = 0
+    site_checked = False
+    try:
+        while auto_mode_var():
+            if not _should_continue_processing(board_positions):
+                # Frames read while our move is being played are stale
+                pipeline.flush()
                 continue
-                
-            if active == color_indicator:
-                move_detected = _handle_player_turn(
-                    opp_color, placement, last_fen_by_color
-                )
-                
-                if move_detected:
-                    _process_detected_move(
-                        root, color_indicator, auto_mode_var, btn_play, move_mode, board_positions,
-                        screenshot_delay_var, update_status_callback, kingside_var,
-                        queenside_var, update_last_fen_for_color, last_fen_by_color
+
+            if not site_checked:
+                # Board positions are stored by the first move; use or learn this site's delay
+                delay_calibrator.begin_session(root, board_positions)
+                site_checked = True
+
+            try:
+                update = pipeline.next_position()
+                if update is None:
+                    continue
+                positions += 1
+                if positions % STATS_LOG_INTERVAL == 0:
+                    _log_pipeline_stats(pipeline)
+
+                placement, active = update.placement, update.active
+                logger.debug(f"Placement: {placement}, Active side: {active}")
+
+                if active == opp_color:
+                    _handle_opponent_turn(opp_color, placement, last_fen_by_color)
+                    continue
+
+                if active == color_indicator:
+                    move_detected = _handle_player_turn(
+                        opp_color, placement, last_fen_by_color
                     )
-                    
-        except Exception as e:
-            _handle_loop_error(e, root, update_status_callback, auto_mode_var)
-            break
+
+                    if move_detected:
+                        _process_detected_move(
+                            root, color_indicator, auto_mode_var, btn_play, move_mode, board_positions,
+                            screenshot_delay_var, update_status_callback, kingside_var,
+                            queenside_var, update_last_fen_for_color, last_fen_by_color
+                        )
+                        pipeline.flush()
+
+            except Exception as e:
+                _handle_loop_error(e, root, update_status_callback, auto_mode_var)
+                break
+    finally:
+        pipeline.stop()
+        stop_pondering()
+
+
+def _start_pipeline(root, auto_mode_var, color_indicator, board_positions):
+    """
+    Starts the frame pipeline chosen by the `pipeline` detector setting.
+    Falls back to threads if the capture and detector processes cannot start.
+    """
+    if load_detector_config()["pipeline"] == "processes":
+        from executor.frame_processes import ProcessFramePipeline
+        pipeline = ProcessFramePipeline(root, auto_mode_var, color_indicator, board_positions)
+        try:
+            pipeline.start()
+            return pipeline
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"Multi-process pipeline unavailable ({e}); using threads")
+
+    pipeline = FramePipeline(root, auto_mode_var, color_indicator, board_positions)
+    pipeline.start()
+    return pipeline
 
 
 def _should_continue_processing(board_positions):
@@ -195,44 +245,33 @@ def _should_continue_processing(board_positions):
     return True
 
 
-def _capture_current_position(root, auto_mode_var, color_indicator):
-    """
-    Capture screenshot and extract current board position.
-    Returns tuple of (placement, active_color) or None if failed.
-    """
-    logger.debug("Capturing screenshot for auto-move…")
-    screenshot = capture_screenshot_in_memory(root, auto_mode_var)
-    
-    if not screenshot:
-        logger.warning("Screenshot returned None; retrying in 0.02s…")
-        time.sleep(0.02)
-        return None
-        
-    boxes = get_positions(screenshot)
-    if not boxes:
-        logger.warning("Board detection failed; retrying in 0.2s…")
-        time.sleep(0.2)
-        return None
-        
-    return _parse_fen_position(color_indicator, boxes)
-
-
-def _parse_fen_position(color_indicator, boxes):
-    """
-    Parse FEN from board positions and return placement and active color.
-    """
-    _, _, _, current_fen = get_fen_from_position(color_indicator, boxes)
-    logger.info(f"FEN extracted: {current_fen}")
-    
-    parts = current_fen.split()
-    if len(parts) < 2:
-        logger.warning("Malformed FEN; retrying in 0.2s…")
-        time.sleep(0.2)
-        return None
-        
-    placement, active = parts[0], parts[1]
-    logger.debug(f"Placement: {placement}, Active side: {active}")
-    return placement, active
+def _log_pipeline_stats(pipeline):
+    stats = pipeline.stats()
+    logger.info(
+        f"Frame pipeline: {stats['captured']} captured, {stats['inferred']} inferred, "
+        f"{stats['dropped_frames']} stale frames dropped, {stats['detection_failures']} detection failures, "
+        f"{stats['fen_changes']} placement changes"
+    )
+    frames = frame_deduper.stats()
+    if frames["frames"]:  # Both caches live in the detector process in multi-process mode
+        logger.info(
+            f"Frame dedupe: {frames['frames']} frames, {frames['hits']} unchanged "
+            f"({frames['hit_rate']:.0%} hit rate)"
+        )
+        stats = square_cache.stats()
+        logger.info(
+            f"Square cache: {stats['frames']} frames, {stats['unchanged']} unchanged, "
+            f"{stats['incremental']} incremental, {stats['detector_runs']} detector runs"
+        )
+    capture = screen_capture.stats()
+    if capture["mean_ms"] is not None:
+        rate = capture["captures_per_second"] or 0.0
+        logger.info(
+            f"Screen capture ({capture['backend']}): {capture['captures']} captures, "
+            f"{capture['failures']} failures, {capture['mean_ms']:.1f} ms mean, "
+            f"{capture['max_ms']:.1f} ms max, {rate:.1f}/s, "
+            f"{capture['pixels'] / max(1, capture['captures']) / 1e6:.2f} MP/capture"
+        )
 
 
 def _handle_opponent_turn(opp_color, placement, last_fen_by_color):
@@ -245,7 +284,6 @@ def _handle_opponent_turn(opp_color, placement, last_fen_by_color):
         last_fen_by_color[opp_color] = placement
     else:
         logger.debug("Opponent placement unchanged.")
-    time.sleep(0.02)
 
 
 def _handle_player_turn(opp_color, placement, last_fen_by_color):
@@ -254,13 +292,11 @@ def _handle_player_turn(opp_color, placement, last_fen_by_color):
     Returns True if a genuine opponent move was detected.
     """
     if opp_color not in last_fen_by_color:
-        logger.debug("Our turn detected but no previous opponent-FEN known; sleeping 0.02s…")
-        time.sleep(0.02)
+        logger.debug("Our turn detected but no previous opponent-FEN known")
         return False
         
     if placement == last_fen_by_color[opp_color]:
-        logger.debug("It's our turn but opponent didn't move; sleeping 0.02s…")
-        time.sleep(0.02)
+        logger.debug("It's our turn but opponent didn't move")
         return False
         
     # Genuine move detected
@@ -276,10 +312,13 @@ def _process_detected_move(
 ):
     """
     Process a detected opponent move by calculating and executing our response.
+    The screenshot delay is only an upper bound: we continue as soon as the
+    opponent's move animation has finished.
     """
-    delay = screenshot_delay_var.get()
-    logger.debug(f"Sleeping for {delay}s before calculating move…")
-    time.sleep(delay)
+    search_policy.start_turn()  # Our clock runs from here until our move is played
+    delay = screenshot_delay_var()
+    waited = wait_for_settle(board_positions, max_wait=delay)
+    logger.debug(f"Board settled {waited:.2f}s after the opponent's move (limit {delay}s)")
     
     process_move_thread(
         root, color_indicator, auto_mode_var, btn_play, move_mode, board_positions,
@@ -287,8 +326,9 @@ def _process_detected_move(
         update_last_fen_for_color, last_fen_by_color, screenshot_delay_var
     )
     
-    logger.debug(f"Sleeping again for {delay}s after launching move…")
-    time.sleep(delay)
+    # Give the move thread up to the delay to claim processing_event, then go on
+    if not processing_event.wait(delay):
+        logger.debug(f"Move thread did not start processing within {delay}s")
 
 
 def _handle_loop_error(error, root, update_status_callback, auto_mode_var):
@@ -296,5 +336,6 @@ def _handle_loop_error(error, root, update_status_callback, auto_mode_var):
     Handle errors that occur in the main processing loop.
     """
     logger.error(f"Exception in auto_move_loop: {error}", exc_info=True)
-    root.after(0, lambda err=error: update_status_callback(f"Error: {str(err)}"))
-    auto_mode_var.set(False)
\ No newline at end of file
+    QTimer.singleShot(0, lambda err=error: update_status_callback(f"Error: {str(err)}"))
+    root.auto_mode_var = False
+    root.auto_mode_check.setChecked(False)
\ No newline at end of file
@@ -0,0 +1,102 @@
+import io
+import time
+import shutil
+import argparse
+import subprocess
+from PIL import Image
+from board_detection.detector_stats import summarize
+from .screen_capture import ScreenCapture
+
+
+def _grim_png(grim_path, region=None):
+    """
+    The previous grim path: PNG on stdout, decoded by PIL.
+    """
+    command = [grim_path]
+    if region is not None:
+        x, y, w, h = region
+        command += ["-g", f"{x},{y} {w}x{h}"]
+    data = subprocess.run(command + ["-"], stdout=subprocess.PIPE, check=True).stdout
+    image = Image.open(io.BytesIO(data))
+    return image.convert("RGB")
+
+
+def bench_capture(grabbers, iterations=30, warmup=2):
+    """
+    Times each (label, grab) pair. Returns (label, fps, p50, p95) rows;
+    grabbers that fail are reported and left out.
+    """
+    rows = []
+    for label, grab in grabbers:
+        try:
+            for _ in range(warmup):
+                grab()
+        except Exception as e:
+            print(f"Skipping {label}: {e}")
+            continue
+        samples = []
+        start = time.perf_counter()
+        for _ in range(iterations):
+            grab_start = time.perf_counter()
+            grab()
+            samples.append((time.perf_counter() - grab_start) * 1000.0)
+        fps = iterations / (time.perf_counter() - start)
+        rows.append((label, fps, *summarize(samples)))
+    return rows
+
+
+def _region(text):
+    x, y, w, h = (int(v) for v in text.split(","))
+    return x, y, w, h
+
+
+def run_capture_benchmark(argv=None):
+    """
+    Entry point for `--bench-capture`: compares grim's PNG output with the
+    raw PPM path, plus the backend screen capture would pick on this machine.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark screen capture paths")
+    parser.add_argument("--bench-capture", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--region", type=_region, default=None, help="x,y,w,h (default: full screen)")
+    args, _ = parser.parse_known_args(argv)
+    region = args.region
+
+    grabbers = []
+    grim_path = shutil.which("grim")
+    if grim_path is not None:
+        grim = ScreenCapture()
+        grim.backend, grim.grim_path = "grim", grim_path
+        grabbers += [
+            ("grim png + PIL decode", lambda: _grim_png(grim_path, region)),
+            ("grim ppm -> PIL image", lambda: grim.capture(region)),
+            ("grim ppm -> frame", lambda: grim.capture_frame(region)),
+        ]
+    else:
+        print("grim not found; skipping the grim comparison")
+
+    capture = ScreenCapture()
+    try:
+        backend = capture._resolve_backend()
+        if backend != "grim":
+            grabbers.append((f"{backend} -> frame", lambda: capture.capture_frame(region)))
+    except Exception as e:
+        print(f"Skipping default backend ({e})")
+
+    if not grabbers:
+        print("No capture backend available")
+        return 1
+
+    try:
+        rows = bench_capture(grabbers, args.iterations)
+    finally:
+        capture.close()
+    if not rows:
+        print("Every capture path failed")
+        return 1
+
+    size = f"{region[2]}x{region[3]} region" if region else "full screen"
+    print(f"Screen capture, {size}, {args.iterations} iterations")
+    for label, fps, p50, p95 in rows:
+        print(f"  {label:<24} {fps:7.1f} fps   p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+    return 0
@@ -0,0 +1,172 @@
+import os
+import json
+import math
+import logging
+import threading
+from PyQt6.QtCore import QTimer
+from board_detection.sprite_matcher import tile_features, theme_key
+from board_detection.square_cache import geometry_from_positions
+from executor.screen_capture import screen_capture, board_capture_region
+from executor.settle import settle_detector
+from utils.get_root_dir import get_root_dir
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DELAY_CALIBRATION_FILE = os.path.join(get_root_dir(), "screenshot_delays.json")
+
+# Animations measured before a site's delay is set
+CALIBRATION_MOVES = 5
+
+# Safety margin on top of the slowest measured animation
+CALIBRATION_MARGIN_RATIO = 0.25
+CALIBRATION_MIN_MARGIN = 0.05
+
+# Range of the screenshot delay spin box
+MIN_DELAY = 0.0
+MAX_DELAY = 1.0
+
+
+def site_key(board_positions):
+    """
+    Identifies the site by its board theme (light/dark square colours) and
+    square size, read from a capture of the board. Returns None if no board is stored.
+    """
+    geometry = geometry_from_positions(board_positions)
+    if geometry is None:
+        return None
+    region = board_capture_region(board_positions)
+    frame = screen_capture.capture_frame(region)
+    x, y, square_size = geometry
+    features = tile_features(frame, x - region[0], y - region[1], square_size)
+    theme = "".join(f"{value:x}" for value in theme_key(features))
+    return f"{theme}/{int(square_size)}px"
+
+
+def calibrated_delay(samples):
+    """
+    Screenshot delay for measured animation times (seconds): the slowest one
+    plus a safety margin, rounded up to the spin box's 0.1 s steps.
+    """
+    slowest = max(samples)
+    delay = slowest + max(CALIBRATION_MIN_MARGIN, slowest * CALIBRATION_MARGIN_RATIO)
+    return min(MAX_DELAY, max(MIN_DELAY, math.ceil(round(delay * 10, 6)) / 10))
+
+
+def load_delays(path=DELAY_CALIBRATION_FILE):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable screenshot delay file {path}: {e}")
+        return {}
+
+
+def save_delays(delays, path=DELAY_CALIBRATION_FILE):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(delays, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+class DelayCalibrator:
+    """
+    Learns the screenshot delay per site from how long its piece animations
+    take. Each auto session looks the site up: a stored delay is applied
+    straight away, an unknown site is calibrated over its first
+    CALIBRATION_MOVES animations (as measured by the settle detector).
+    """
+
+    def __init__(self, path=DELAY_CALIBRATION_FILE, moves=CALIBRATION_MOVES):
+        self.path = path
+        self.moves = moves
+        self.app = None
+        self.site = None
+        self.samples = None  # None while not calibrating
+        self._lock = threading.Lock()
+        settle_detector.add_listener(self.record)
+
+    @property
+    def calibrating(self):
+        return self.samples is not None
+
+    def begin_session(self, app, board_positions):
+        """
+        Applies the stored delay for the current site, or starts calibrating it.
+        """
+        try:
+            site = site_key(board_positions)
+        except Exception as e:
+            logger.warning(f"Could not identify the site for delay calibration: {e}")
+            return
+        if site is None:
+            return
+
+        delay = load_delays(self.path).get(site, {}).get("delay")
+        with self._lock:
+            self.app, self.site = app, site
+            self.samples = None if delay is not None else []
+        if delay is not None:
+            logger.info(f"Using calibrated screenshot delay {delay}s for site {site}")
+            self._apply(delay)
+        else:
+            logger.info(f"New site {site}; calibrating screenshot delay over {self.moves} moves")
+
+    def start(self, app, board_positions=None):
+        """
+        Re-calibrates the current site (or the one identified from board_positions).
+        """
+        site = None
+        if board_positions:
+            try:
+                site = site_key(board_positions)
+            except Exception as e:
+                logger.warning(f"Could not identify the site for delay calibration: {e}")
+        with self._lock:
+            self.app = app
+            self.site = site or self.site
+            self.samples = []
+        if self.site is None:
+            logger.warning("No board located yet; calibration starts once a move has been played")
+        logger.info(f"Calibrating screenshot delay over the next {self.moves} moves")
+
+    def record(self, board_positions, seconds):
+        """
+        Settle detector listener: collects one animation time while calibrating.
+        """
+        with self._lock:
+            if self.samples is None or self.site is None:
+                return
+            self.samples.append(seconds)
+            logger.debug(f"Calibration sample {len(self.samples)}/{self.moves}: {seconds * 1000:.0f} ms")
+            if len(self.samples) < self.moves:
+                return
+            samples, self.samples = self.samples, None
+            site = self.site
+
+        delay = calibrated_delay(samples)
+        delays = load_delays(self.path)
+        delays[site] = {"delay": delay, "animation_ms": [round(s * 1000) for s in samples]}
+        try:
+            save_delays(delays, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save screenshot delay to {self.path}: {e}")
+        logger.info(f"Calibrated screenshot delay for site {site}: {delay}s "
+                    f"(slowest animation {max(samples) * 1000:.0f} ms)")
+        self._apply(delay)
+
+    def _apply(self, delay):
+        app = self.app
+        if app is None:
+            return
+        app.screenshot_delay_var = delay
+        spinbox = getattr(app, "delay_spinbox", None)
+        if spinbox is not None:
+            QTimer.singleShot(0, lambda: spinbox.setValue(delay))
+
+
+# Shared calibrator; fed by settle_detector and used by auto_move_loop
+delay_calibrator = DelayCalibrator()
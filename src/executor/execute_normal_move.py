@@ -6,6 +6,7 @@ from executor.get_current_fen import get_current_fen
 from executor.chess_notation_to_index import chess_notation_to_index
 from executor.move_piece import move_piece
 from executor.did_my_piece_move import did_my_piece_move
+from executor.settle import wait_for_settle
 
 # Logger setup
 logger = logging.getLogger(__name__)
@@ -61,7 +62,7 @@ def execute_normal_move(
 
         logger.debug(f"Dragging from {start_idx} to {end_idx}")
         move_piece(color_indicator, move, board_positions, auto_mode_var, root, btn_play, move_mode)
-        time.sleep(0.1)
+        wait_for_settle(board_positions, max_wait=1.0, expect_change=True, fallback_delay=0.1)
 
         img = capture_screenshot_in_memory()
         if not img:
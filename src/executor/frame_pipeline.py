@@ -0,0 +1,291 @@
+import time
+import logging
+import threading
+from collections import namedtuple
+
+from board_detection import get_positions
+from board_detection.fen_extractor import grid_to_fen
+from board_detection.square_cache import SquareTileCache, FrameDeduper, geometry_from_positions
+from executor.capture_screenshot_in_memory import capture_frame_in_memory
+from executor.screen_capture import screen_capture, board_capture_region
+from executor.processing_sync import processing_event
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Per-square cache so unchanged squares are not re-detected every frame
+square_cache = SquareTileCache()
+
+# Skips detection entirely while the captured board pixels stay identical
+frame_deduper = FrameDeduper()
+
+# Shortest time between two captures; inference overlaps the next capture
+CAPTURE_INTERVAL = 0.02
+
+# How long a stage waits for input before re-checking whether to stop
+STAGE_TIMEOUT = 0.1
+
+# Back-off after a failed capture or an unreadable board
+CAPTURE_RETRY_DELAY = 0.02
+DETECTION_RETRY_DELAY = 0.2
+
+Frame = namedtuple("Frame", "epoch frame_id captured_at image region")
+GridResult = namedtuple("GridResult", "epoch frame_id captured_at grid")
+FenUpdate = namedtuple("FenUpdate", "epoch frame_id captured_at placement active changed")
+
+
+def grid_position(grid, color_indicator):
+    """
+    Returns (placement, active_color) for a screen-oriented grid, or None.
+    """
+    parts = grid_to_fen(grid, color_indicator).split()
+    if len(parts) < 2:
+        logger.warning("Malformed FEN; skipping frame")
+        return None
+    return parts[0], parts[1]
+
+
+class LatestSlot:
+    """
+    Single-item hand-off between two threads where the newest item wins.
+    put() overwrites an item nobody took yet (counted as dropped), so a slow
+    consumer always gets the latest frame instead of a backlog.
+    """
+
+    def __init__(self):
+        self._item = None
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Takes the current item, waiting up to `timeout` for one. Returns None on timeout.
+        """
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def clear(self):
+        with self._cond:
+            self._item = None
+
+
+class BoardReader:
+    """
+    Turns a captured frame into the screen-oriented 8x8 grid: straight from
+    the frame deduper when its pixels are unchanged, else via the square cache.
+    """
+
+    def __init__(self, board_positions, square_cache, frame_deduper):
+        self.board_positions = board_positions
+        self.square_cache = square_cache
+        self.frame_deduper = frame_deduper
+
+    def read(self, image, region=None, recapture=None):
+        """
+        Returns the grid for a frame, or None. When the board is not found in
+        a captured region, recapture() may return a full-screen frame to retry on.
+        """
+        signature, grid = self._lookup_frame(image, region)
+        if grid is not None:
+            return [row[:] for row in grid]
+
+        grid = self._classify(image, region)
+        if grid is None and region and recapture is not None:
+            # The board may have moved away from where it was last stored
+            logger.debug("Board not found in its stored region; retrying on the full screen")
+            signature = None  # The grid no longer comes from the checked frame
+            image = recapture()
+            grid = self._classify(image) if image is not None else None
+        if grid is not None and signature is not None:
+            self.frame_deduper.store(signature, [row[:] for row in grid])
+        return grid
+
+    def _lookup_frame(self, image, region):
+        geometry = geometry_from_positions(self.board_positions)
+        if geometry is None:
+            return None, None
+        origin = region[:2] if region else (0, 0)
+        local_geometry = (geometry[0] - origin[0], geometry[1] - origin[1], geometry[2])
+        return self.frame_deduper.lookup(image, local_geometry)
+
+    def _classify(self, image, region=None):
+        if region is None:
+            return self.square_cache.classify(image, self.board_positions, lambda: get_positions(image))
+        origin = region[:2]
+        return self.square_cache.classify(
+            image, self.board_positions, lambda: get_positions(image, origin), origin
+        )
+
+
+class FramePipeline:
+    """
+    Reads the board on three threads so capture never waits for detection:
+
+    capture   -> grabs the board region into a latest-frame slot
+    inference -> frame dedupe, square cache and detector; yields an 8x8 grid
+    fen       -> grid to FEN, diffed against the previous placement
+
+    Each hand-off is a LatestSlot, so frames that go stale while the detector
+    is busy are dropped rather than queued. Consumers call next_position().
+    flush() discards everything in flight, e.g. after one of our moves.
+    """
+
+    def __init__(self, root, auto_mode_var, color_indicator, board_positions):
+        self.root = root
+        self.auto_mode_var = auto_mode_var
+        self.color_indicator = color_indicator
+        self.board_positions = board_positions
+        self.reader = BoardReader(board_positions, square_cache, frame_deduper)
+
+        self.frames = LatestSlot()
+        self.grids = LatestSlot()
+        self.updates = LatestSlot()
+        self.epoch = 0
+        self.error = None
+        self.counters = {"captured": 0, "inferred": 0, "detection_failures": 0, "fen_changes": 0}
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _running(self):
+        return not self._stop.is_set() and self.auto_mode_var()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def start(self):
+        frame_deduper.reset()
+        for name, target in (("capture", self._capture_stage),
+                             ("inference", self._inference_stage),
+                             ("fen", self._fen_stage)):
+            thread = threading.Thread(target=self._run_stage, args=(name, target),
+                                      name=f"frame-pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Frame pipeline started")
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Frame pipeline stopped")
+
+    def flush(self):
+        """
+        Drops every frame and result captured so far.
+        """
+        with self._lock:
+            self.epoch += 1
+        for slot in (self.frames, self.grids, self.updates):
+            slot.clear()
+
+    def _recapture(self):
+        return capture_frame_in_memory(self.root, self.auto_mode_var)
+
+    def _current(self, item):
+        return item is not None and item.epoch == self.epoch
+
+    def _run_stage(self, name, target):
+        try:
+            target()
+        except Exception as e:
+            logger.error(f"Frame pipeline {name} stage failed: {e}", exc_info=True)
+            self.error = e
+            self._stop.set()
+        finally:
+            # Grabbers are per thread; inference also captures when it re-grabs a frame
+            screen_capture.close()
+
+    # --- Stages --------------------------------------------------------------
+
+    def _capture_stage(self):
+        frame_id = 0
+        while self._running():
+            if processing_event.is_set() or not self.board_positions:
+                time.sleep(STAGE_TIMEOUT)
+                continue
+
+            started = time.perf_counter()
+            epoch = self.epoch
+            region = board_capture_region(self.board_positions)
+            image = capture_frame_in_memory(self.root, self.auto_mode_var, region)
+            if image is None:
+                time.sleep(CAPTURE_RETRY_DELAY)
+                continue
+            if screen_capture.backend == "screencopy":
+                image = image.copy()  # The view is overwritten by this thread's next capture
+
+            frame_id += 1
+            self._count("captured")
+            self.frames.put(Frame(epoch, frame_id, started, image, region))
+
+            remaining = CAPTURE_INTERVAL - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _inference_stage(self):
+        while self._running():
+            frame = self.frames.get(STAGE_TIMEOUT)
+            if not self._current(frame):
+                continue
+
+            grid = self.reader.read(frame.image, frame.region, self._recapture)
+            self._count("inferred")
+            if grid is None:
+                self._count("detection_failures")
+                logger.warning("Board detection failed; retrying in 0.2s…")
+                time.sleep(DETECTION_RETRY_DELAY)
+                continue
+            self.grids.put(GridResult(frame.epoch, frame.frame_id, frame.captured_at, grid))
+
+    def _fen_stage(self):
+        last_placement = None
+        while self._running():
+            result = self.grids.get(STAGE_TIMEOUT)
+            if not self._current(result):
+                continue
+
+            position = grid_position(result.grid, self.color_indicator)
+            if position is None:
+                continue
+            placement, active = position
+            changed = placement != last_placement
+            if changed:
+                logger.info(f"FEN extracted: {placement} {active}")
+                last_placement = placement
+                self._count("fen_changes")
+            self.updates.put(FenUpdate(result.epoch, result.frame_id, result.captured_at,
+                                       placement, active, changed))
+
+    # --- Consumer --------------------------------------------------------------
+
+    def next_position(self, timeout=STAGE_TIMEOUT):
+        """
+        Returns the newest FenUpdate, or None if none arrived within `timeout`.
+        Re-raises an error that stopped one of the stages.
+        """
+        if self.error is not None:
+            raise self.error
+        update = self.updates.get(timeout)
+        return update if self._current(update) else None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["dropped_frames"] = self.frames.dropped
+        stats["dropped_grids"] = self.grids.dropped
+        stats["dropped_updates"] = self.updates.dropped
+        return stats
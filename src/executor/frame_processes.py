@@ -0,0 +1,280 @@
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+
+from board_detection.square_cache import SquareTileCache, FrameDeduper, geometry_from_positions
+from executor.frame_ring import SharedFrameRing
+from executor.frame_pipeline import (
+    LatestSlot, BoardReader, FenUpdate, grid_position,
+    CAPTURE_INTERVAL, STAGE_TIMEOUT, CAPTURE_RETRY_DELAY, DETECTION_RETRY_DELAY,
+)
+from executor.store_board_positions import store_board_positions
+from executor.processing_sync import processing_event
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Frames kept in the shared ring; the detector only ever reads the newest
+RING_SLOTS = 4
+
+# Seconds to wait for the capture process to create the ring
+PROCESS_START_TIMEOUT = 30
+
+# Seconds to wait for a child process to exit before terminating it
+PROCESS_STOP_TIMEOUT = 2
+
+COUNTERS = ("captured", "inferred", "dropped_frames", "detection_failures", "fen_changes")
+
+
+class FrameProcessState:
+    """
+    Shared flags and values handed to both child processes.
+    """
+
+    def __init__(self, context):
+        self.stop = context.Event()
+        self.paused = context.Event()        # Set while one of our moves is being played
+        self.frame_ready = context.Event()   # Set by the capture process after each write
+        self.full_frame = context.Event()    # Detector lost the board; grab the whole screen once
+        self.epoch = context.Value("q", 0)
+        self.geometry = context.Array("d", 3)  # board x, y, square size (size 0 = unknown)
+        self.counters = context.Array("q", len(COUNTERS))
+
+    def count(self, name, amount=1):
+        with self.counters.get_lock():
+            self.counters[COUNTERS.index(name)] += amount
+
+    def board_positions(self, positions):
+        """
+        Rebuilds `positions` in place from the shared geometry. Returns False if no board is stored.
+        """
+        x, y, size = (int(v) for v in self.geometry[:])
+        if size <= 0:
+            positions.clear()
+            return False
+        if geometry_from_positions(positions) != (x, y, size):
+            store_board_positions(positions, x, y, size)
+        return True
+
+
+def capture_process_main(state, ready):
+    """
+    Capture process: grabs the board region into a SharedFrameRing whose name
+    is sent back through `ready` (or an "error: ..." string if it fails).
+    """
+    from executor.screen_capture import screen_capture, board_capture_region
+
+    try:
+        # Slots are sized for a full-screen frame so region fallbacks fit too
+        ring = SharedFrameRing(slots=RING_SLOTS, slot_bytes=screen_capture.capture_frame().nbytes)
+    except Exception as e:
+        ready.put(f"error: {e}")
+        return
+    ready.put(ring.name)
+
+    positions = {}
+    try:
+        while not state.stop.is_set():
+            if state.paused.is_set() or not state.board_positions(positions):
+                time.sleep(STAGE_TIMEOUT)
+                continue
+
+            started = time.perf_counter()
+            region = board_capture_region(positions)
+            if state.full_frame.is_set():
+                state.full_frame.clear()
+                region = None
+            epoch = state.epoch.value
+            try:
+                image = screen_capture.capture_frame(region)
+                ring.write(image, region, epoch, time.monotonic())
+            except Exception as e:
+                logger.warning(f"Capture process failed to grab a frame: {e}")
+                time.sleep(CAPTURE_RETRY_DELAY)
+                continue
+            state.count("captured")
+            state.frame_ready.set()
+
+            remaining = CAPTURE_INTERVAL - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+    finally:
+        screen_capture.close()
+        ring.close()
+
+
+def detector_process_main(state, ring_name, color_indicator, results):
+    """
+    Detector process: reads the newest frame from the ring, runs the frame
+    deduper, square cache and detector, and publishes FenUpdates on `results`.
+    """
+    try:
+        ring = SharedFrameRing(ring_name)
+    except Exception as e:
+        results.put(("error", f"Could not attach to frame ring: {e}"))
+        return
+
+    positions = {}
+    reader = BoardReader(positions, SquareTileCache(), FrameDeduper())
+    last_seq = 0
+    last_placement = None
+    try:
+        while not state.stop.is_set():
+            state.frame_ready.wait(STAGE_TIMEOUT)
+            state.frame_ready.clear()
+            item = ring.read_latest(last_seq)
+            if item is None:
+                continue
+            seq, epoch, captured_at, frame, region = item
+            if last_seq and seq > last_seq + 1:
+                state.count("dropped_frames", seq - last_seq - 1)
+            last_seq = seq
+            if epoch != state.epoch.value or not state.board_positions(positions):
+                continue
+
+            grid = reader.read(frame, region)
+            state.count("inferred")
+            if grid is None:
+                state.count("detection_failures")
+                if region is not None:
+                    state.full_frame.set()
+                else:
+                    logger.warning("Board detection failed; retrying in 0.2s…")
+                    time.sleep(DETECTION_RETRY_DELAY)
+                continue
+
+            position = grid_position(grid, color_indicator)
+            if position is None:
+                continue
+            placement, active = position
+            changed = placement != last_placement
+            if changed:
+                logger.info(f"FEN extracted: {placement} {active}")
+                last_placement = placement
+                state.count("fen_changes")
+            results.put(FenUpdate(epoch, seq, captured_at, placement, active, changed))
+    except Exception as e:
+        logger.error(f"Detector process failed: {e}", exc_info=True)
+        results.put(("error", f"Detector process failed: {e}"))
+    finally:
+        ring.close()
+
+
+class ProcessFramePipeline:
+    """
+    Multi-process variant of FramePipeline with the same interface.
+
+    A capture process writes frames into a shared-memory ring and a detector
+    process turns the newest one into FenUpdates, so neither competes with Qt
+    and input injection for this interpreter's GIL. A relay thread here keeps
+    the children in sync with the board geometry and processing_event, and
+    hands their results to next_position() through a LatestSlot.
+    """
+
+    def __init__(self, root, auto_mode_var, color_indicator, board_positions):
+        self.root = root
+        self.auto_mode_var = auto_mode_var
+        self.color_indicator = color_indicator
+        self.board_positions = board_positions
+
+        self.context = multiprocessing.get_context("spawn")
+        self.state = FrameProcessState(self.context)
+        self.results = self.context.Queue()
+        self.updates = LatestSlot()
+        self.error = None
+        self._processes = []
+        self._relay = None
+
+    def _sync_state(self):
+        geometry = geometry_from_positions(self.board_positions)
+        self.state.geometry[:] = geometry if geometry is not None else (0, 0, 0)
+        if processing_event.is_set():
+            self.state.paused.set()
+        else:
+            self.state.paused.clear()
+
+    def start(self):
+        """
+        Starts both processes. Raises RuntimeError if the capture process cannot start.
+        """
+        self._sync_state()
+        ready = self.context.Queue()
+        capture = self.context.Process(target=capture_process_main, args=(self.state, ready),
+                                       name="chesspilot-capture", daemon=True)
+        capture.start()
+        self._processes.append(capture)
+        try:
+            ring_name = ready.get(timeout=PROCESS_START_TIMEOUT)
+        except queue.Empty:
+            ring_name = "error: timed out"
+        if ring_name.startswith("error: "):
+            self.stop()
+            raise RuntimeError(f"Capture process did not start ({ring_name[7:]})")
+
+        detector = self.context.Process(
+            target=detector_process_main, args=(self.state, ring_name, self.color_indicator, self.results),
+            name="chesspilot-detector", daemon=True,
+        )
+        detector.start()
+        self._processes.append(detector)
+
+        self._relay = threading.Thread(target=self._relay_results, name="frame-pipeline-relay", daemon=True)
+        self._relay.start()
+        logger.info("Multi-process frame pipeline started")
+
+    def _relay_results(self):
+        while not self.state.stop.is_set():
+            self._sync_state()
+            try:
+                message = self.results.get(timeout=STAGE_TIMEOUT)
+            except queue.Empty:
+                if any(not process.is_alive() for process in self._processes):
+                    self.error = RuntimeError("A frame pipeline process exited unexpectedly")
+                    return
+                continue
+            if isinstance(message, FenUpdate):
+                self.updates.put(message)
+            else:
+                self.error = RuntimeError(message[1])
+                return
+
+    def stop(self, timeout=PROCESS_STOP_TIMEOUT):
+        self.state.stop.set()
+        if self._relay is not None:
+            self._relay.join(timeout)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"{process.name} did not exit; terminating it")
+                process.terminate()
+        self._processes = []
+        logger.info("Multi-process frame pipeline stopped")
+
+    def flush(self):
+        """
+        Drops every frame and result captured so far.
+        """
+        with self.state.epoch.get_lock():
+            self.state.epoch.value += 1
+        self._sync_state()
+        self.updates.clear()
+
+    def next_position(self, timeout=STAGE_TIMEOUT):
+        """
+        Returns the newest FenUpdate, or None if none arrived within `timeout`.
+        Raises RuntimeError if a child process failed.
+        """
+        if self.error is not None:
+            raise self.error
+        update = self.updates.get(timeout)
+        if update is None or update.epoch != self.state.epoch.value:
+            return None
+        return update
+
+    def stats(self):
+        stats = dict(zip(COUNTERS, self.state.counters[:]))
+        stats["dropped_updates"] = self.updates.dropped
+        return stats
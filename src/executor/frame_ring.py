@@ -0,0 +1,115 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+# Per-slot header: sequence number (0 = empty, -1 = being written), flush
+# epoch, capture time, frame shape and the captured (x, y, w, h) region
+# (w = 0 for a full screen)
+SLOT_HEADER = np.dtype([
+    ("seq", "<i8"),
+    ("epoch", "<i8"),
+    ("captured_at", "<f8"),
+    ("shape", "<i4", 3),
+    ("region", "<i4", 4),
+])
+# Ring header: latest published sequence number, slot count and slot size
+RING_HEADER = np.dtype([("latest", "<i8"), ("slots", "<i8"), ("slot_bytes", "<i8")])
+_ALIGN = 64
+
+
+def _aligned(size):
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class SharedFrameRing:
+    """
+    Ring of frame slots in a multiprocessing.shared_memory block, written by
+    one process and read by another without pickling the pixels.
+
+    The writer fills slot seq % slots and publishes it by writing its sequence
+    number last. Readers only want the newest frame: read_latest() copies it
+    out and re-checks the sequence number, so a slot the writer lapped while it
+    was being copied is discarded instead of returned torn.
+    """
+
+    def __init__(self, name=None, slots=4, slot_bytes=0):
+        if name is None:
+            slot_bytes = _aligned(slot_bytes)
+            size = self._header_bytes(slots) + slots * slot_bytes
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:self._header_bytes(slots)] = bytes(self._header_bytes(slots))
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+        self._ring = np.ndarray((1,), dtype=RING_HEADER, buffer=self.shm.buf, offset=0)
+        if self.owner:
+            self._ring["slots"], self._ring["slot_bytes"] = slots, slot_bytes
+        self.slots = int(self._ring["slots"][0])
+        self.slot_bytes = int(self._ring["slot_bytes"][0])
+        self._headers = np.ndarray((self.slots,), dtype=SLOT_HEADER, buffer=self.shm.buf,
+                                   offset=RING_HEADER.itemsize)
+        self._data_offset = self._header_bytes(self.slots)
+        self._next = 1
+
+    @staticmethod
+    def _header_bytes(slots):
+        return _aligned(RING_HEADER.itemsize + slots * SLOT_HEADER.itemsize)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _slot(self, index, shape):
+        offset = self._data_offset + index * self.slot_bytes
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    def write(self, frame, region=None, epoch=0, captured_at=0.0):
+        """
+        Copies an (H, W, C) uint8 frame into the next slot and publishes it.
+        Raises ValueError if the frame does not fit in a slot.
+        """
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+        seq = self._next
+        self._next += 1
+        index = seq % self.slots
+        header = self._headers[index:index + 1]
+
+        header["seq"] = -1
+        np.copyto(self._slot(index, frame.shape), frame)
+        header["epoch"] = epoch
+        header["captured_at"] = captured_at
+        header["shape"] = frame.shape
+        header["region"] = region if region is not None else (0, 0, 0, 0)
+        header["seq"] = seq
+        self._ring["latest"] = seq
+        return seq
+
+    def read_latest(self, after=0):
+        """
+        Returns (seq, epoch, captured_at, frame, region) for the newest frame
+        with a sequence number above `after`, or None. The frame is a private
+        copy and region is None for full-screen frames.
+        """
+        seq = int(self._ring["latest"][0])
+        if seq <= after:
+            return None
+        index = seq % self.slots
+        header = self._headers[index]
+        if int(header["seq"]) != seq:
+            return None
+        shape = tuple(int(v) for v in header["shape"])
+        region = tuple(int(v) for v in header["region"])
+        epoch, captured_at = int(header["epoch"]), float(header["captured_at"])
+        frame = self._slot(index, shape).copy()
+        if int(self._headers[index]["seq"]) != seq:
+            return None  # Overwritten while copying
+        return seq, epoch, captured_at, frame, region if region[2] else None
+
+    def close(self):
+        # Views into the buffer must go before the mapping can be closed
+        self._ring = self._headers = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,7 +1,6 @@
 import logging
 from PyQt6.QtCore import QTimer
-import time
-from board_detection import get_positions, get_fen_from_position
+from board_detection import get_positions, get_fen_from_position, detector_ready
 from executor.capture_screenshot_in_memory import capture_screenshot_in_memory
 from executor.get_best_move import get_best_move
 from executor.is_castling_possible import is_castling_possible
@@ -13,11 +12,17 @@ from executor.verify_move import verify_move
 from executor.move_piece import move_piece
 from executor.is_two_square_king_move import is_two_square_king_move
 from executor.processing_sync import processing_event
+from executor.settle import wait_for_settle
+from executor.screen_capture import screen_capture
+from services.search_policy import search_policy
 
 # Logger setup
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Seconds to wait for the background detector load before giving up
+DETECTOR_LOAD_TIMEOUT = 60
+
 
 def process_move(
     root,
@@ -45,6 +50,9 @@ def process_move(
     _initialize_move_processing(root, btn_play, update_status)
     
     try:
+        if not _wait_for_detector(root, auto_mode_var, update_status):
+            return
+
         # Extract board position
         board_data = _extract_board_position(root, auto_mode_var, color_indicator, update_status)
         if not board_data:
@@ -78,10 +86,33 @@ def _initialize_move_processing(root, btn_play, update_status):
     Set up the initial state for move processing.
     """
     processing_event.set()
+    search_policy.start_turn()  # Already running if auto mode saw the opponent move
     QTimer.singleShot(0, lambda: btn_play.setEnabled(False))
     QTimer.singleShot(0, lambda: update_status("\nAnalyzing board..."))
 
 
+def _wait_for_detector(root, auto_mode_var, update_status):
+    """
+    Block until the background-loaded detector is ready.
+    Returns False if it failed to load or took too long.
+    """
+    ready = detector_ready()
+    if not ready.done():
+        logger.info("Waiting for the piece detector to finish loading")
+        QTimer.singleShot(0, lambda: update_status("\nLoading detector..."))
+
+    try:
+        ready.result(timeout=DETECTOR_LOAD_TIMEOUT)
+        return True
+    except Exception as e:
+        logger.error(f"Piece detector unavailable: {e}")
+        QTimer.singleShot(0, lambda: update_status("\nDetector unavailable"))
+        if callable(auto_mode_var):
+            root.auto_mode_var = False
+            root.auto_mode_check.setChecked(False)
+        return False
+
+
 def _extract_board_position(root, auto_mode_var, color_indicator, update_status):
     """
     Capture screenshot and extract board position data.
@@ -185,6 +216,7 @@ def _process_best_move(
         board_positions, auto_mode_var, root, btn_play, move_mode, update_status,
         kingside_var, queenside_var, last_fen_by_color
     )
+    search_policy.end_turn()
 
 
 def _prepare_position_data(board_data, color_indicator, kingside_var, queenside_var, board_positions):
@@ -316,16 +348,21 @@ def _perform_castling_move(
             root.auto_mode_check.setChecked(False)
 
     QTimer.singleShot(0, lambda: update_status(status_msg))
-    time.sleep(0.3)
+    # King and rook both animate; wait until neither is moving
+    wait_for_settle(board_positions, max_wait=1.5, expect_change=True, fallback_delay=0.3)
     
-    _verify_castling_move(best_move, updated_fen, color_indicator, root, update_status, last_fen_by_color)
+    _verify_castling_move(
+        best_move, updated_fen, color_indicator, root, update_status, last_fen_by_color, board_positions
+    )
 
 
-def _verify_castling_move(best_move, updated_fen, color_indicator, root, update_status, last_fen_by_color):
+def _verify_castling_move(
+    best_move, updated_fen, color_indicator, root, update_status, last_fen_by_color, board_positions=None
+):
     """
     Verify that the castling move was executed correctly.
     """
-    success, _ = verify_move(color_indicator, best_move, updated_fen)
+    success, _ = verify_move(color_indicator, best_move, updated_fen, board_positions=board_positions)
     
     if not success:
         logger.error("Move verification failed after castling.")
@@ -354,6 +391,9 @@ def _finalize_move_processing(root, auto_mode_var, btn_play):
     """
     Clean up after move processing is complete.
     """
+    # This thread ends here; release its grabber (display handle, screencopy memfd)
+    screen_capture.close()
+    search_policy.cancel_turn()  # No-op once end_turn() has charged a played move
     processing_event.clear()
     auto_val = auto_mode_var() if callable(auto_mode_var) else auto_mode_var
     if not auto_val:
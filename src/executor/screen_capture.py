@@ -0,0 +1,287 @@
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+import mss
+import numpy as np
+from PIL import Image
+from .is_wayland import is_wayland
+from utils.get_binary_path import get_binary_path
+from wayland_capture.screencopy import WaylandScreencopy, ScreencopyError
+from board_detection.square_cache import geometry_from_positions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Latency samples and timestamps kept for the capture stats
+STATS_WINDOW = 200
+
+# Border grabbed around the board so the detector still sees all of it
+REGION_MARGIN_RATIO = 0.1
+REGION_MIN_MARGIN = 16
+
+
+def board_capture_region(board_positions, margin_ratio=REGION_MARGIN_RATIO, min_margin=REGION_MIN_MARGIN):
+    """
+    Returns the (x, y, w, h) screenshot rectangle around the board stored by
+    store_board_positions, with a margin, or None if no board is stored yet.
+    """
+    geometry = geometry_from_positions(board_positions)
+    if geometry is None:
+        return None
+    board_x, board_y, square_size = geometry
+    board_size = 8 * square_size
+    margin = max(min_margin, int(board_size * margin_ratio))
+    x = max(0, int(board_x) - margin)
+    y = max(0, int(board_y) - margin)
+    return x, y, int(board_x + board_size) + margin - x, int(board_y + board_size) + margin - y
+
+
+def parse_ppm_header(data):
+    """
+    Parses a binary PPM (P6) header. Returns (width, height, pixel_offset).
+    Only 8-bit (maxval 255) images are supported; empty or truncated output
+    raises ValueError.
+    """
+    fields = []
+    position = 0
+    while len(fields) < 4:
+        # Skip whitespace and comments between header fields
+        while data[position:position + 1].isspace():
+            position += 1
+        if data[position:position + 1] == b"#":
+            position = data.find(b"\n", position) + 1
+            if position == 0:
+                raise ValueError("Truncated PPM header")
+            continue
+        end = position
+        while end < len(data) and not data[end:end + 1].isspace():
+            end += 1
+        if end == len(data):
+            raise ValueError("Truncated PPM header")
+        fields.append(data[position:end])
+        position = end
+    magic, width, height, maxval = fields
+    if magic != b"P6" or int(maxval) != 255:
+        raise ValueError(f"Unsupported PPM image ({magic!r}, maxval {maxval!r})")
+    # Exactly one whitespace byte separates the header from the pixels
+    return int(width), int(height), position + 1
+
+
+class ScreenCapture:
+    """
+    Long-lived screen grabber shared by every caller.
+
+    The backend and the grim path are resolved once: wlr-screencopy on
+    Wayland (grim if the compositor lacks it), mss elsewhere. Regions are
+    always in physical pixels; on HiDPI Wayland outputs they are converted
+    to logical coordinates for grim and screencopy. mss handles
+    wrap X11/GDI display handles and screencopy clients own a Wayland
+    connection; neither may be shared between threads, so each thread
+    lazily gets its own. Threads that capture must call close() before they
+    exit, or their grabber leaks.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.grim_path = None
+        self.counters = {"captures": 0, "failures": 0, "pixels": 0}
+        self._latencies = deque(maxlen=STATS_WINDOW)
+        self._timestamps = deque(maxlen=STATS_WINDOW)
+        self.logical_regions = True  # Cleared if grim/screencopy regions come back at another scale
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _resolve_backend(self):
+        with self._lock:
+            if self.backend is None:
+                if is_wayland():
+                    try:
+                        self._local.screencopy = WaylandScreencopy()
+                        self.backend = "screencopy"
+                    except (ScreencopyError, OSError) as e:
+                        logger.info(f"Native screencopy unavailable ({e}); falling back to grim")
+                        self.grim_path = get_binary_path("grim")
+                        self.backend = "grim"
+                else:
+                    self.backend = "mss"
+                logger.info(f"Screen capture backend: {self.backend}")
+        return self.backend
+
+    def _grabber(self):
+        """
+        Returns this thread's mss instance and primary monitor, creating them once.
+        """
+        grabber = getattr(self._local, "grabber", None)
+        if grabber is None:
+            grabber = mss.mss()
+            self._local.grabber = grabber
+            self._local.monitor = grabber.monitors[1]
+        return grabber, self._local.monitor
+
+    def _grab_mss(self, region=None):
+        grabber, monitor = self._grabber()
+        if region is not None:
+            # Region is relative to the primary monitor, like full screenshots
+            x, y, w, h = region
+            x, y = min(x, monitor["width"] - 1), min(y, monitor["height"] - 1)
+            monitor = {
+                "left": monitor["left"] + x,
+                "top": monitor["top"] + y,
+                "width": min(w, monitor["width"] - x),
+                "height": min(h, monitor["height"] - y),
+            }
+        return grabber.grab(monitor)
+
+    def _capture_mss(self, region=None):
+        sct_img = self._grab_mss(region)
+        # Decode BGRA straight into an RGB image; skips building sct_img.rgb first
+        return Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
+
+    def _frame_mss(self, region=None):
+        sct_img = self._grab_mss(region)
+        # A view over the grabbed BGRA bytes; no conversion or copy
+        return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+
+    def _screencopy(self):
+        client = getattr(self._local, "screencopy", None)
+        if client is None:
+            client = WaylandScreencopy()
+            self._local.screencopy = client
+        return client
+
+    def _grab_logical(self, grab, scale, region):
+        """
+        grim and screencopy take regions in logical (compositor) coordinates,
+        while regions here are physical pixels, as in full screenshots. Grabs
+        the logical rectangle covering region and crops the frame back to
+        exactly region. If a frame comes back at a different scale
+        (fractional scaling, a region past the output edge), region capture
+        is turned off and full frames are cropped instead.
+        """
+        if region is None:
+            return grab(None)
+        x, y, w, h = (int(v) for v in region)
+        if self.logical_regions:
+            left, top = x // scale, y // scale
+            right, bottom = -(-(x + w) // scale), -(-(y + h) // scale)
+            frame = grab((left, top, right - left, bottom - top))
+            if frame.shape[:2] == ((bottom - top) * scale, (right - left) * scale):
+                x, y = x - left * scale, y - top * scale
+                return frame[y:y + h, x:x + w]
+            logger.warning(f"{self.backend} region came back at another scale; capturing full frames instead")
+            self.logical_regions = False
+        return grab(None)[y:y + h, x:x + w]
+
+    def _frame_screencopy(self, region=None):
+        client = self._screencopy()
+        return self._grab_logical(client.capture, client.scale, region)
+
+    def _capture_screencopy(self, region=None):
+        frame = np.ascontiguousarray(self._frame_screencopy(region))
+        return Image.frombytes("RGB", (frame.shape[1], frame.shape[0]), frame, "raw", "BGRX")
+
+    def _run_grim(self, region=None):
+        """
+        Runs grim with uncompressed PPM output (no PNG encode/decode) and
+        returns (width, height, pixel_offset, data) for its P6 output.
+        """
+        command = [self.grim_path, "-t", "ppm"]
+        if region is not None:
+            x, y, w, h = region
+            command += ["-g", f"{x},{y} {w}x{h}"]
+        data = subprocess.run(command + ["-"], stdout=subprocess.PIPE, check=True).stdout
+        width, height, offset = parse_ppm_header(data)
+        return width, height, offset, data
+
+    def _capture_grim(self, region=None):
+        if region is not None:
+            return Image.fromarray(np.ascontiguousarray(self._frame_grim(region)[..., ::-1]))
+        width, height, offset, data = self._run_grim()
+        return Image.frombuffer("RGB", (width, height), data[offset:], "raw", "RGB", 0, 1)
+
+    def _grim_frame(self, region=None):
+        width, height, offset, data = self._run_grim(region)
+        rgb = np.frombuffer(data, dtype=np.uint8, count=width * height * 3, offset=offset)
+        # Reversed channel view: BGR like the other backends' BGRA, without a copy
+        return rgb.reshape(height, width, 3)[..., ::-1]
+
+    def _frame_grim(self, region=None):
+        # grim cannot report the output scale; a scaled output is caught by _grab_logical
+        return self._grab_logical(self._grim_frame, 1, region)
+
+    def _timed(self, grab, region):
+        start = time.perf_counter()
+        try:
+            result = grab(region)
+        except Exception:
+            with self._lock:
+                self.counters["failures"] += 1
+            self.close()  # A broken display handle is not reused
+            raise
+
+        end = time.perf_counter()
+        width, height = result.size if isinstance(result, Image.Image) else result.shape[1::-1]
+        with self._lock:
+            self.counters["captures"] += 1
+            self.counters["pixels"] += width * height
+            self._latencies.append((end - start) * 1000.0)
+            self._timestamps.append(end)
+        return result
+
+    def capture(self, region=None):
+        """
+        Grabs the primary monitor, or only the (x, y, w, h) region of it, as a
+        PIL image. Raises on failure.
+        """
+        backend = self.backend or self._resolve_backend()
+        return self._timed(getattr(self, f"_capture_{backend}"), region)
+
+    def capture_frame(self, region=None):
+        """
+        Like capture(), but returns an (H, W, 4) uint8 BGRA array (BGR with
+        three channels from grim). It is a view of the grabbed buffer, so PIL
+        is never involved. A screencopy frame is only valid until the calling
+        thread's next capture.
+        """
+        backend = self.backend or self._resolve_backend()
+        return self._timed(getattr(self, f"_frame_{backend}"), region)
+
+    def capture_region(self, x, y, w, h):
+        """
+        Grabs only the (x, y, w, h) rectangle, in full-screenshot coordinates.
+        """
+        return self.capture((x, y, w, h))
+
+    def close(self):
+        """
+        Releases the calling thread's grabber; the next capture opens a new one.
+        """
+        for name in ("grabber", "screencopy"):
+            grabber = getattr(self._local, name, None)
+            if grabber is not None:
+                setattr(self._local, name, None)
+                try:
+                    grabber.close()
+                except Exception as e:
+                    logger.debug(f"Error closing screen grabber: {e}")
+
+    def stats(self):
+        """
+        Returns capture counters, recent latency (mean/max ms) and captures per second.
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            latencies = list(self._latencies)
+            timestamps = list(self._timestamps)
+        stats["backend"] = self.backend
+        stats["mean_ms"] = sum(latencies) / len(latencies) if latencies else None
+        stats["max_ms"] = max(latencies) if latencies else None
+        span = timestamps[-1] - timestamps[0] if len(timestamps) > 1 else 0.0
+        stats["captures_per_second"] = (len(timestamps) - 1) / span if span > 0 else None
+        return stats
+
+
+# Shared instance used by capture_screenshot_in_memory
+screen_capture = ScreenCapture()
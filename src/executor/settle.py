@@ -0,0 +1,162 @@
+import time
+import logging
+import threading
+from collections import deque
+import numpy as np
+from board_detection.preprocess import crop_frame, nearest_indices
+from board_detection.square_cache import geometry_from_positions
+from executor.screen_capture import screen_capture, board_capture_region
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Seconds between two board samples
+SETTLE_POLL_INTERVAL = 0.01
+
+# Identical samples in a row before the board counts as stable
+SETTLE_STABLE_SAMPLES = 3
+
+# Thumbnail side in pixels and the per-channel change that counts as motion;
+# small enough to ignore compression/scaling noise, large enough for a piece
+SETTLE_THUMBNAIL_SIDE = 48
+SETTLE_PIXEL_THRESHOLD = 24
+
+# Seconds to wait for an expected animation to start; no longer than the
+# fixed post-move sleep this replaced, so a move that landed before the
+# first sample never costs more than before
+SETTLE_CHANGE_TIMEOUT = 0.1
+
+# Settle times kept for stats and delay calibration
+SETTLE_HISTORY = 50
+
+
+def board_thumbnail(frame, geometry=None, side=SETTLE_THUMBNAIL_SIDE):
+    """
+    Nearest-neighbour side x side sample of the board in a frame array (or of
+    the whole frame without a geometry), as int16 for diffing.
+    """
+    if geometry is not None:
+        x, y, square_size = geometry
+        frame = crop_frame(frame, (x, y, x + 8 * square_size, y + 8 * square_size))
+    height, width = frame.shape[:2]
+    rows = nearest_indices(height, side)
+    cols = nearest_indices(width, side)
+    return frame[rows[:, None], cols[None, :], :3].astype(np.int16)
+
+
+def frames_differ(previous, current, threshold=SETTLE_PIXEL_THRESHOLD):
+    if previous.shape != current.shape:
+        return True
+    return bool((np.abs(current - previous) > threshold).any())
+
+
+class SettleDetector:
+    """
+    Waits for the board to stop moving instead of sleeping a fixed time.
+
+    The board area is sampled every few milliseconds into a small thumbnail
+    and diffed against the previous sample; the board is stable once it has
+    not changed for SETTLE_STABLE_SAMPLES samples in a row. With
+    expect_change, stability only counts after motion was first seen, so a
+    piece animation that has not started yet is not mistaken for a still board.
+    """
+
+    def __init__(self, poll_interval=SETTLE_POLL_INTERVAL, stable_samples=SETTLE_STABLE_SAMPLES):
+        self.poll_interval = poll_interval
+        self.stable_samples = stable_samples
+        self.history = deque(maxlen=SETTLE_HISTORY)
+        self.counters = {"settled": 0, "timeouts": 0, "failures": 0}
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """
+        Registers callback(board_positions, seconds), called with the length
+        of every expected animation that was seen to start and then finish.
+        """
+        self.listeners.append(callback)
+
+    def _sample(self, board_positions):
+        region = board_capture_region(board_positions)
+        frame = screen_capture.capture_frame(region)
+        geometry = geometry_from_positions(board_positions)
+        if geometry is None:
+            return board_thumbnail(frame)
+        origin = region[:2]
+        return board_thumbnail(frame, (geometry[0] - origin[0], geometry[1] - origin[1], geometry[2]))
+
+    def wait(self, board_positions, max_wait=1.0, expect_change=False, change_timeout=SETTLE_CHANGE_TIMEOUT,
+             fallback_delay=None):
+        """
+        Blocks until the board is stable or max_wait seconds passed. With
+        expect_change, waits up to change_timeout for motion to start first.
+        Returns the seconds waited. If the screen cannot be sampled, sleeps
+        fallback_delay (default max_wait) instead.
+        """
+        start = time.perf_counter()
+        try:
+            previous = self._sample(board_positions)
+        except Exception as e:
+            delay = max_wait if fallback_delay is None else fallback_delay
+            logger.debug(f"Settle sampling unavailable ({e}); sleeping {delay}s")
+            with self._lock:
+                self.counters["failures"] += 1
+            time.sleep(delay)
+            return delay
+
+        moved = not expect_change
+        still = 0
+        while True:
+            time.sleep(self.poll_interval)
+            elapsed = time.perf_counter() - start
+            try:
+                current = self._sample(board_positions)
+            except Exception as e:
+                logger.debug(f"Settle sampling failed ({e}); continuing")
+                with self._lock:
+                    self.counters["failures"] += 1
+                return elapsed
+            if frames_differ(previous, current):
+                moved, still = True, 0
+            else:
+                still += 1
+            previous = current
+
+            if moved and still >= self.stable_samples:
+                if expect_change:
+                    for callback in self.listeners:
+                        callback(board_positions, elapsed)
+                return self._record(elapsed, settled=True)
+            if not moved and elapsed >= change_timeout:
+                # No animation started; the move may have landed before sampling
+                return self._record(elapsed, settled=True)
+            if elapsed >= max_wait:
+                logger.debug(f"Board still changing after {max_wait}s; continuing anyway")
+                return self._record(elapsed, settled=False)
+
+    def _record(self, elapsed, settled):
+        with self._lock:
+            self.counters["settled" if settled else "timeouts"] += 1
+            self.history.append(elapsed)
+        logger.debug(f"Board {'settled' if settled else 'not settled'} after {elapsed * 1000:.0f} ms")
+        return elapsed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            history = list(self.history)
+        stats["mean_ms"] = sum(history) / len(history) * 1000.0 if history else None
+        stats["max_ms"] = max(history) * 1000.0 if history else None
+        return stats
+
+
+# Shared detector used after our moves and before reading the opponent's
+settle_detector = SettleDetector()
+
+
+def wait_for_settle(board_positions, **kwargs):
+    """
+    Waits for the board to stop animating; see SettleDetector.wait.
+    """
+    return settle_detector.wait(board_positions, **kwargs)
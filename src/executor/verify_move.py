@@ -2,18 +2,23 @@ import time
 import logging
 from board_detection import get_positions, get_fen_from_position
 from executor import capture_screenshot_in_memory
+from executor.settle import wait_for_settle
 
 # Logger setup
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-def verify_move(color_indicator, _, expected_fen, attempts_limit=3):
+def verify_move(color_indicator, _, expected_fen, attempts_limit=3, board_positions=None):
     expected_pieces = expected_fen.split()[0]
     logger.debug(f"Starting move verification for color {color_indicator} with expected pieces: {expected_pieces}")
     
     for attempt in range(1, attempts_limit + 1):
         if attempt > 1:
-            time.sleep(0.2)
+            if board_positions:
+                # The board may still be animating; retry once it is still
+                wait_for_settle(board_positions, max_wait=1.0, fallback_delay=0.2)
+            else:
+                time.sleep(0.2)
             logger.debug(f"Retrying verification attempt {attempt}/{attempts_limit}")
             
         screenshot = capture_screenshot_in_memory()
@@ -15,14 +15,18 @@ class BoardAnalyzer:
         return capture_screenshot_in_memory(root, auto_mode_var)
 
     @staticmethod
-    def get_board_fen(color_indicator, root, auto_mode_var):
+    def get_board_fen(color_indicator, root, auto_mode_var, detect=None):
+        """
+        `detect` is any callable with the get_positions(image) interface,
+        e.g. create_backend("sprite").detect. Defaults to the configured backend.
+        """
         logger.debug("Getting current board FEN")
         screenshot = capture_screenshot_in_memory(root, auto_mode_var)
         if not screenshot:
             logger.warning("Screenshot capture failed")
             return None
 
-        boxes = get_positions(screenshot)
+        boxes = (detect or get_positions)(screenshot)
         if not boxes:
             logger.error("No chessboard found in screenshot")
             return None
@@ -1,8 +1,8 @@
-import time
 import logging
 from executor.move_piece import move_piece
 from executor.chess_notation_to_index import chess_notation_to_index
 from executor.move_cursor_to_button import move_cursor_to_button
+from executor.settle import wait_for_settle
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +11,7 @@ class MoveExecutor:
     def execute_move(color_indicator, move, board_positions, auto_mode_var, root, btn_play, move_mode):
         logger.debug(f"Executing move: {move}")
         move_piece(color_indicator, move, board_positions, auto_mode_var, root, btn_play, move_mode)
-        time.sleep(0.1)
+        wait_for_settle(board_positions, max_wait=1.0, expect_change=True, fallback_delay=0.1)
 
     @staticmethod
     def convert_move_to_indices(color_indicator, root, auto_mode_var, move):
@@ -1,8 +1,10 @@
-from PyQt6.QtWidgets import (QWidget, QLabel, QSlider, QDoubleSpinBox,
+from PyQt6.QtWidgets import (QWidget, QLabel, QSlider, QDoubleSpinBox, QComboBox,
                              QRadioButton, QButtonGroup, QVBoxLayout, QHBoxLayout, QCheckBox)
 from PyQt6.QtCore import Qt
 import logging
 from gui.update_depth_label import update_depth_label
+from gui.update_search_mode import update_search_mode
+from services.search_policy import SEARCH_MODES, SEARCH_MODE_LABELS
 
 logger = logging.getLogger(__name__)
 
@@ -98,6 +100,40 @@ def create_widgets(app):
         font-size: 9pt;
     """)
     depth_layout.addWidget(app.depth_label)
+    depth_layout.addSpacing(5)
+
+    search_frame = QWidget()
+    search_layout = QHBoxLayout(search_frame)
+    search_layout.setContentsMargins(0, 0, 0, 0)
+
+    search_label = QLabel("Search Mode:")
+    search_label.setStyleSheet(f"""
+        color: {app.text_color};
+        font-family: 'Segoe UI';
+        font-size: 10pt;
+    """)
+    search_layout.addWidget(search_label)
+
+    app.search_mode_combo = QComboBox()
+    for mode in SEARCH_MODES:
+        app.search_mode_combo.addItem(SEARCH_MODE_LABELS[mode], mode)
+    app.search_mode_combo.setCurrentIndex(SEARCH_MODES.index(app.search_mode_var))
+    app.search_mode_combo.setStyleSheet(f"""
+        QComboBox {{
+            background-color: #F3F1F1;
+            color: #000000;
+            border: 1px solid #cccccc;
+            border-radius: 3px;
+            padding: 2px 5px;
+            font-family: 'Segoe UI';
+        }}
+    """)
+    app.search_mode_combo.currentIndexChanged.connect(
+        lambda index: update_search_mode(app, app.search_mode_combo.itemData(index))
+    )
+    search_layout.addWidget(app.search_mode_combo, 1)
+    depth_layout.addWidget(search_frame)
+    app.depth_slider.setEnabled(app.search_mode_var == "depth")
     depth_layout.addSpacing(10)
 
     delay_label = QLabel("Auto Move Screenshot Delay (sec):")
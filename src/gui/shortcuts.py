@@ -1,6 +1,7 @@
 from PyQt6.QtGui import QShortcut, QKeySequence
 from PyQt6.QtCore import Qt
 import logging
+from services import EngineService
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,7 @@ def handle_esc_key(app):
         app.auto_mode_var = False
         app.auto_mode_check.setChecked(False)
         app.btn_play.setEnabled(True)
+        EngineService.stop_pondering()  # The game is over; don't leave `go ponder` running
 
 def bind_shortcuts(app):
     QShortcut(QKeySequence(Qt.Key.Key_Escape), app).activated.connect(lambda: handle_esc_key(app) if app.color_indicator else None)
@@ -38,6 +40,10 @@ def bind_shortcuts(app):
         lambda: app.queenside_check.toggle() if app.color_indicator else None
     )
 
+    QShortcut(QKeySequence(Qt.Key.Key_C), app).activated.connect(
+        lambda: recalibrate_delay(app) if app.color_indicator else None
+    )
+
     QShortcut(QKeySequence(Qt.Key.Key_Up), app).activated.connect(
         lambda: adjust_delay_up(app) if app.color_indicator is None else None
     )
@@ -66,6 +72,11 @@ def adjust_delay_down(app):
     app.screenshot_delay_var = new_val
     app.delay_spinbox.setValue(new_val)
 
+def recalibrate_delay(app):
+    from executor.delay_calibration import delay_calibrator, CALIBRATION_MOVES
+    delay_calibrator.start(app, app.board_positions)
+    app.update_status(f"Calibrating screenshot delay over the next {CALIBRATION_MOVES} moves")
+
 def adjust_depth_up(app):
     current = app.depth_var
     new_val = min(30, current + 1)
@@ -0,0 +1,11 @@
+import logging
+from services.search_policy import search_policy
+
+logger = logging.getLogger(__name__)
+
+def update_search_mode(app, mode):
+    logger.debug(f"Search mode changed to {mode}")
+    app.search_mode_var = mode
+    search_policy.set_mode(mode)
+    # The depth slider only limits fixed-depth searches
+    app.depth_slider.setEnabled(mode == "depth")
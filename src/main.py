@@ -1,10 +1,11 @@
 import threading
 import sys
+import multiprocessing
 import logging
 from pathlib import Path
 import os
-from PyQt6.QtWidgets import QApplication, QMainWindow
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication, QMainWindow, QMessageBox
+from PyQt6.QtCore import Qt, QTimer
 
 from utils.logging_setup import setup_console_logging
 from utils.chess_resources_manager import setup_resources
@@ -22,9 +23,11 @@ if not setup_resources(script_dir, project_dir):
     sys.exit(1)
 
 from executor import process_move, execute_normal_move
+from board_detection import start_detector_loading
 from core import GameState, AppConfig
 from game import MoveExecutor, BoardAnalyzer, MoveValidator, AutoPlayController
 from services import EngineService
+from services.search_policy import search_policy
 
 from gui.set_window_icon import set_window_icon
 from gui.create_widget import create_widgets
@@ -56,6 +59,7 @@ class ChessPilot(QMainWindow):
         self.last_fen = ""
         self.last_fen_by_color = {'w': None, 'b': None}
         self.depth_var = AppConfig.DEFAULT_DEPTH
+        self.search_mode_var = AppConfig.DEFAULT_SEARCH_MODE
         self.auto_mode_var = False
         self.board_positions = {}
 
@@ -78,9 +82,21 @@ class ChessPilot(QMainWindow):
 
         logger.debug(f"Initial window size: {self.width()}x{self.height()}")
 
+        # Load and warm up the piece detector while the user picks a color
+        self.detector_ready = start_detector_loading()
+        self.detector_ready.add_done_callback(self.on_detector_loaded)
+
         if not self.engine_service.initialize():
             logger.warning("Stockfish initialization failed at startup")
 
+    def on_detector_loaded(self, future):
+        error = future.exception()
+        if error is None:
+            logger.info("Piece detector ready")
+            return
+        logger.error(f"Piece detector failed to load: {error}")
+        QTimer.singleShot(0, lambda: QMessageBox.critical(self, "Error", f"Could not load the piece detector:\n{error}"))
+
     def closeEvent(self, event):
         logger.info("Application closing - cleaning up Stockfish process")
         self.engine_service.cleanup()
@@ -95,6 +111,8 @@ class ChessPilot(QMainWindow):
     def set_color(self, color):
         logger.info(f"Color selected: {'White' if color == 'w' else 'Black'}")
         self.color_indicator = color
+        search_policy.reset_clock()
+        EngineService.stop_pondering()  # A ponder search from the previous game is stale
         self.color_frame.hide()
         self.main_frame.show()
         self.btn_play.setEnabled(True)
@@ -225,6 +243,25 @@ class ChessPilot(QMainWindow):
         )
 
 if __name__ == "__main__":
+    # Frozen builds re-launch this executable for the frame pipeline processes
+    multiprocessing.freeze_support()
+
+    if "--bench-detector" in sys.argv:
+        from board_detection.benchmark import run_detector_benchmark
+        sys.exit(run_detector_benchmark(sys.argv[1:]))
+    if "--quantize-detector" in sys.argv:
+        from board_detection.quantize import run_quantize
+        sys.exit(run_quantize(sys.argv[1:]))
+    if "--bench-backends" in sys.argv:
+        from board_detection.benchmark import run_backend_benchmark
+        sys.exit(run_backend_benchmark(sys.argv[1:]))
+    if "--bench-batch" in sys.argv:
+        from board_detection.benchmark import run_batch_benchmark
+        sys.exit(run_batch_benchmark(sys.argv[1:]))
+    if "--bench-capture" in sys.argv:
+        from executor.capture_benchmark import run_capture_benchmark
+        sys.exit(run_capture_benchmark(sys.argv[1:]))
+
     logger.info("Stockfish and ONNX model setup completed successfully")
 
     from services import EngineService
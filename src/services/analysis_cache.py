@@ -0,0 +1,187 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from utils.get_root_dir import get_root_dir
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_FILE = os.path.join(get_root_dir(), "analysis_cache.sqlite")
+
+# Entries kept in memory / on disk before the least recently used are evicted
+MEMORY_ENTRIES = 4096
+DISK_ENTRIES = 200000
+
+# Disk trims happen every this many stores rather than on each one
+TRIM_INTERVAL = 256
+
+Analysis = namedtuple("Analysis", "best_move ponder score_cp score_mate engine_ms")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+    key TEXT PRIMARY KEY,
+    best_move TEXT NOT NULL,
+    ponder TEXT,
+    score_cp INTEGER,
+    score_mate INTEGER,
+    engine_ms REAL NOT NULL,
+    used_at REAL NOT NULL
+)
+"""
+
+
+def normalize_fen(fen):
+    """
+    Placement, side to move, castling rights and en passant square: the
+    fields that decide the search. Move counters are dropped.
+    """
+    return " ".join(fen.split()[:4])
+
+
+def analysis_key(fen, limits, options=""):
+    """
+    Cache key for a search: normalized FEN plus the search limits
+    (e.g. "depth=15") and an engine/options fingerprint.
+    """
+    return f"{normalize_fen(fen)}|{limits}|{options}"
+
+
+class AnalysisCache:
+    """
+    Engine results by position and search parameters, so repeated positions
+    (openings across games, retries, repetitions) skip Stockfish.
+
+    Lookups go to an in-memory LRU first, then to a SQLite store that
+    survives restarts; disk hits are promoted into memory. If the database
+    cannot be opened or written, the cache carries on in memory only.
+    """
+
+    def __init__(self, path=ANALYSIS_CACHE_FILE, memory_entries=MEMORY_ENTRIES, disk_entries=DISK_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.entries = OrderedDict()
+        self.counters = {"lookups": 0, "memory_hits": 0, "disk_hits": 0, "stores": 0, "saved_ms": 0.0}
+        self._lock = threading.Lock()
+        self._db = None
+        self._opened = False
+
+    def _database(self):
+        """Opens the store on first use; None if it is unavailable."""
+        if not self._opened:
+            self._opened = True
+            try:
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(SCHEMA)
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Analysis cache store unavailable ({e}); caching in memory only")
+                self._db = None
+        return self._db
+
+    def _disable_database(self, error):
+        logger.warning(f"Analysis cache store failed ({error}); caching in memory only")
+        try:
+            self._db.close()
+        except sqlite3.Error:
+            pass
+        self._db = None
+
+    def _remember(self, key, analysis):
+        self.entries[key] = analysis
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.memory_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Returns the cached Analysis for a key, or None.
+        """
+        with self._lock:
+            self.counters["lookups"] += 1
+            analysis = self.entries.get(key)
+            if analysis is not None:
+                self.entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+            else:
+                analysis = self._load(key)
+                if analysis is None:
+                    return None
+                self._remember(key, analysis)
+                self.counters["disk_hits"] += 1
+            self.counters["saved_ms"] += analysis.engine_ms
+            return analysis
+
+    def _load(self, key):
+        db = self._database()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                "SELECT best_move, ponder, score_cp, score_mate, engine_ms FROM analysis WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE analysis SET used_at = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+        except sqlite3.Error as e:
+            self._disable_database(e)
+            return None
+        return Analysis(*row) if row is not None else None
+
+    def put(self, key, analysis):
+        """
+        Stores an Analysis in memory and on disk.
+        """
+        with self._lock:
+            self._remember(key, analysis)
+            self.counters["stores"] += 1
+            db = self._database()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, *analysis, time.time()),
+                )
+                if self.counters["stores"] % TRIM_INTERVAL == 0:
+                    self._trim(db)
+                db.commit()
+            except sqlite3.Error as e:
+                self._disable_database(e)
+
+    def _trim(self, db):
+        excess = db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0] - self.disk_entries
+        if excess > 0:
+            db.execute(
+                "DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY used_at LIMIT ?)", (excess,)
+            )
+            logger.debug(f"Evicted {excess} least recently used analyses from the store")
+
+    def hit_rate(self):
+        with self._lock:
+            lookups = self.counters["lookups"]
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        return hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self.entries)
+            stats["disk_entries"] = None
+            db = self._database()
+            if db is not None:
+                try:
+                    stats["disk_entries"] = db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+                except sqlite3.Error as e:
+                    self._disable_database(e)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hits"] = hits
+        stats["hit_rate"] = hits / stats["lookups"] if stats["lookups"] else 0.0
+        stats["disk_bytes"] = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return stats
+
+
+# Shared cache consulted by EngineService before every search
+analysis_cache = AnalysisCache()
@@ -0,0 +1,371 @@
+import os
+import logging
+import threading
+import subprocess
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# Logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# Seconds to wait for handshakes (uci/isready) before treating the engine as hung
+HANDSHAKE_TIMEOUT = 10
+
+# Seconds a search may run past its deadline after `stop` before it is abandoned
+STOP_GRACE = 2
+
+# Typed events parsed from engine output
+Info = namedtuple("Info", "depth score_cp score_mate nodes pv raw")
+BestMove = namedtuple("BestMove", "move ponder")
+ReadyOk = namedtuple("ReadyOk", "")
+UciOk = namedtuple("UciOk", "")
+Option = namedtuple("Option", "name type default raw")
+Line = namedtuple("Line", "text")  # Anything else, e.g. the board printed by `d`
+
+# info is the last scored info line; stopped is True if `stop` ended the search
+SearchResult = namedtuple("SearchResult", "best_move ponder info stopped")
+
+
+class EngineError(Exception):
+    """The engine is not running, exited, or returned something unusable."""
+
+
+class EngineTimeout(EngineError):
+    """The engine did not answer before its deadline."""
+
+
+def _int_after(tokens, key):
+    try:
+        return int(tokens[tokens.index(key) + 1])
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_line(line):
+    """
+    Parses one line of UCI output into an Info, BestMove, ReadyOk, UciOk,
+    Option or Line event.
+    """
+    tokens = line.split()
+    if not tokens:
+        return Line(line)
+    keyword = tokens[0]
+    if keyword == "info":
+        score_cp = _int_after(tokens, "cp") if "cp" in tokens else None
+        score_mate = _int_after(tokens, "mate") if "mate" in tokens else None
+        pv = tokens[tokens.index("pv") + 1:] if "pv" in tokens else []
+        depth = _int_after(tokens, "depth") if "depth" in tokens else None
+        nodes = _int_after(tokens, "nodes") if "nodes" in tokens else None
+        return Info(depth, score_cp, score_mate, nodes, pv, line)
+    if keyword == "bestmove" and len(tokens) > 1:
+        ponder = tokens[3] if len(tokens) > 3 and tokens[2] == "ponder" else None
+        return BestMove(tokens[1], ponder)
+    if keyword == "readyok":
+        return ReadyOk()
+    if keyword == "uciok":
+        return UciOk()
+    if keyword == "option" and "name" in tokens:
+        end = tokens.index("type") if "type" in tokens else len(tokens)
+        name = " ".join(tokens[tokens.index("name") + 1:end])
+        option_type = tokens[end + 1] if end + 1 < len(tokens) else None
+        default = tokens[tokens.index("default") + 1] if "default" in tokens[:-1] else None
+        return Option(name, option_type, default, line)
+    return Line(line)
+
+
+class EngineClient:
+    """
+    UCI engine subprocess driven without blocking reads.
+
+    A reader thread parses every output line into a typed event and resolves
+    whatever is waiting for it: handshakes (uciok/readyok), the running search
+    (info lines, then bestmove) or a raw-output collector. Callers get
+    concurrent.futures.Future objects and choose how long to wait; a search
+    can also be given a deadline after which `stop` is sent, and is abandoned
+    (with EngineTimeout) if even that gets no answer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.process = None
+        self.name = None
+        self.options = {}
+        self.listeners = []
+        self._reader = None
+        self._lock = threading.Lock()
+        self._waiters = []      # (event type, Future) resolved by the next such event
+        self._search = None     # (Future, [last scored Info]) of the running search
+        self._search_done = threading.Event()
+        self._search_done.set()
+        self._collector = None  # (predicate, lines, Future) for raw command output
+
+    # --- Process --------------------------------------------------------------
+
+    def start(self, timeout=HANDSHAKE_TIMEOUT):
+        """
+        Starts the engine and completes the `uci` handshake.
+        Raises EngineError/EngineTimeout if it does not answer.
+        """
+        flags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+        self.process = subprocess.Popen(
+            [self.path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,  # Never read; a full pipe would block the engine
+            text=True,
+            bufsize=1,
+            creationflags=flags,
+        )
+        self._reader = threading.Thread(target=self._read_loop, name="engine-reader", daemon=True)
+        self._reader.start()
+        handshake = self._expect(UciOk)
+        self.send("uci")
+        self._wait(handshake, timeout, "uci")
+        logger.info(f"Engine started: {self.path} ({len(self.options)} options)")
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def send(self, command):
+        """
+        Writes one command line to the engine.
+        """
+        if not self.alive:
+            raise EngineError("Engine is not running")
+        logger.debug(f"Engine <- {command}")
+        try:
+            with self._lock:
+                self.process.stdin.write(command + "\n")
+                self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise EngineError(f"Could not write to engine: {e}") from e
+
+    def close(self, timeout=5):
+        """
+        Sends `quit` and waits for the engine to exit, killing it if needed.
+        """
+        if self.process is None:
+            return
+        try:
+            if self.alive:
+                self.send("quit")
+            self.process.wait(timeout=timeout)
+        except (EngineError, subprocess.TimeoutExpired):
+            self.process.kill()
+        finally:
+            self._fail_pending(EngineError("Engine closed"))
+            self.process = None
+
+    # --- Reader thread -------------------------------------------------------
+
+    def _read_loop(self):
+        process = self.process
+        try:
+            for raw in process.stdout:
+                line = raw.strip()
+                if line:
+                    self._dispatch(parse_line(line), line)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Engine output closed: {e}")
+        self._fail_pending(EngineError("Engine exited"))
+
+    def _dispatch(self, event, line):
+        if not isinstance(event, Info):
+            logger.debug(f"Engine -> {line}")
+        for listener in self.listeners:
+            listener(event)
+
+        with self._lock:
+            if isinstance(event, Option):
+                self.options[event.name] = event
+            elif isinstance(event, Line) and line.startswith("id name "):
+                self.name = line[len("id name "):]
+            collector = self._collector
+            if collector is not None:
+                predicate, lines, future = collector
+                lines.append(line)
+                if predicate(line):
+                    self._collector = None
+                    _resolve(future, lines)
+
+            search = self._search
+            if search is not None and isinstance(event, Info):
+                if event.score_cp is not None or event.score_mate is not None:
+                    search[1][:] = [event]  # Keep only the latest evaluation
+            elif search is not None and isinstance(event, BestMove):
+                future, infos = search
+                self._search = None
+                self._search_done.set()
+                _resolve(future, SearchResult(event.move, event.ponder, infos[-1] if infos else None,
+                                              search_stopped(future)))
+
+            for waiter in list(self._waiters):
+                event_type, future = waiter
+                if isinstance(event, event_type):
+                    self._waiters.remove(waiter)
+                    _resolve(future, event)
+
+    def _fail_pending(self, error):
+        with self._lock:
+            futures = [future for _, future in self._waiters]
+            self._waiters = []
+            if self._search is not None:
+                futures.append(self._search[0])
+                self._search = None
+            if self._collector is not None:
+                futures.append(self._collector[2])
+                self._collector = None
+            self._search_done.set()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    # --- Requests --------------------------------------------------------------
+
+    def _expect(self, event_type):
+        future = Future()
+        with self._lock:
+            self._waiters.append((event_type, future))
+        return future
+
+    def _wait(self, future, timeout, what):
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise EngineTimeout(f"Engine did not answer '{what}' within {timeout}s") from None
+
+    def is_ready(self):
+        """
+        Sends `isready`; the returned Future resolves with ReadyOk.
+        """
+        future = self._expect(ReadyOk)
+        self.send("isready")
+        return future
+
+    def sync(self, timeout=HANDSHAKE_TIMEOUT):
+        """
+        Blocks until the engine has processed every command sent so far.
+        """
+        self._wait(self.is_ready(), timeout, "isready")
+
+    def command(self, commands, until, timeout=HANDSHAKE_TIMEOUT):
+        """
+        Sends commands and returns the output lines up to and including the
+        first line for which until(line) is true.
+        """
+        future = Future()
+        with self._lock:
+            self._collector = (until, [], future)
+        for command in commands:
+            self.send(command)
+        try:
+            return self._wait(future, timeout, commands[-1])
+        finally:
+            with self._lock:
+                if self._collector is not None and self._collector[2] is future:
+                    self._collector = None
+
+    def search(self, fen, moves=(), deadline=None, ponder=False, **limits):
+        """
+        Starts `go` on a position and returns a Future for its SearchResult.
+        limits are UCI go parameters, e.g. depth=15 or movetime=500. With a
+        deadline (seconds), `stop` is sent once it passes, and the search is
+        failed with EngineTimeout if no bestmove follows within STOP_GRACE.
+        With ponder, the search runs as `go ponder` until ponderhit() or stop;
+        its deadline only starts at ponderhit(). A search still running is
+        stopped first.
+        """
+        if not self._search_done.is_set():
+            self.stop()
+            if not self._search_done.wait(STOP_GRACE):
+                raise EngineTimeout("Previous search did not stop")
+
+        future = Future()
+        future.stop_requested = False
+        with self._lock:
+            self._search = (future, [])
+            self._search_done.clear()
+        position = f"position fen {fen}" + (f" moves {' '.join(moves)}" if moves else "")
+        go = ("go ponder" if ponder else "go") + "".join(f" {name} {value}" for name, value in limits.items() if value is not None)
+        self.send(position)
+        self.send(go)
+        if deadline is not None and not ponder:
+            self._arm_deadline(future, deadline)
+        return future
+
+    def ponderhit(self, future, deadline=None):
+        """
+        Tells a `go ponder` search that the expected move was played, turning
+        it into a normal search. Returns the same Future.
+        """
+        with self._lock:
+            running = self._search is not None and self._search[0] is future
+        if running:
+            self.send("ponderhit")
+            if deadline is not None:
+                self._arm_deadline(future, deadline)
+        return future
+
+    def _arm_deadline(self, future, deadline):
+        def on_deadline():
+            if future.done():
+                return
+            logger.warning(f"Search exceeded its {deadline}s deadline; sending stop")
+            self._stop_search(future)
+            grace = threading.Timer(STOP_GRACE, self._abandon, args=(future,))
+            grace.daemon = True
+            grace.start()
+
+        timer = threading.Timer(deadline, on_deadline)
+        timer.daemon = True
+        timer.start()
+        future.add_done_callback(lambda _: timer.cancel())
+
+    def _abandon(self, future):
+        with self._lock:
+            if future.done():
+                return
+            if self._search is not None and self._search[0] is future:
+                self._search = None
+            self._search_done.set()
+        logger.error("Engine did not return a move after stop; abandoning the search")
+        future.set_exception(EngineTimeout("Engine did not return a move after stop"))
+
+    def _stop_search(self, future):
+        future.stop_requested = True
+        try:
+            self.send("stop")
+        except EngineError as e:
+            logger.debug(f"Could not send stop: {e}")
+
+    def stop(self):
+        """
+        Asks the running search to finish now; its Future still gets the best move found.
+        """
+        with self._lock:
+            search = self._search
+        if search is not None and not search_stopped(search[0]):
+            self._stop_search(search[0])
+
+    def cancel(self, future):
+        """
+        Cancels a search: its Future is marked cancelled and the engine stopped.
+        """
+        with self._lock:
+            running = self._search is not None and self._search[0] is future
+        cancelled = future.cancel()
+        if running:
+            self._stop_search(future)
+        return cancelled
+
+
+def _resolve(future, value):
+    # A cancelled or abandoned Future ignores late answers
+    if not future.done():
+        future.set_result(value)
+
+
+def search_stopped(future):
+    return getattr(future, "stop_requested", False)
@@ -1,24 +1,398 @@
+import os
+import time
+import shutil
+import hashlib
 import logging
-from executor.get_best_move import (
-    get_best_move,
-    initialize_stockfish_at_startup,
-    cleanup_stockfish
-)
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from PyQt6.QtWidgets import QMessageBox
+from PyQt6.QtCore import QTimer
+from services.engine_client import EngineClient, EngineError, EngineTimeout, STOP_GRACE
+from services.search_policy import search_policy
+from services.analysis_cache import analysis_cache, analysis_key, Analysis
+from core.config import AppConfig
+from utils.resource_path import resource_path
+from utils.get_root_dir import get_root_dir
 
 logger = logging.getLogger(__name__)
 
+CONFIG_FILE = os.path.join(get_root_dir(), "engine_config.txt")
+
+# Seconds to wait for the FEN printed by the engine's `d` command
+FEN_TIMEOUT = 5
+
+# Also ask the engine for the post-move FEN and log any mismatch with the
+# locally computed one (costs an engine round-trip per move; debugging only)
+FEN_CROSS_CHECK = False
+
+
+def create_default_config(config_path):
+    """Creates a default config file with user-friendly comments."""
+    with open(config_path, "w") as f:
+        f.write("# ================================\n")
+        f.write("# ChessPilot Engine Configuration\n")
+        f.write("# ================================\n")
+        f.write("# You can edit these values to change engine behavior.\n")
+        f.write("# Be sure to restart the app after editing this file.\n\n")
+
+        f.write("# Memory used in MB (64-1024+ recommended depending on your system)\n")
+        f.write("setoption name Hash value 1024\n\n")
+
+        f.write("# CPU threads to use (1-8 usually; match your CPU core count)\n")
+        f.write("setoption name Threads value 4\n")
+
+    logger.info(f"Created default config file at {config_path}")
+
+
+def load_engine_config(client, config_path=CONFIG_FILE):
+    """Loads engine settings from a config file into a running EngineClient. Creates default with comments if missing.
+    Returns the lines applied."""
+
+    # Always check if config exists and create if missing
+    if not os.path.exists(config_path):
+        create_default_config(config_path)
+
+    # Load and apply the config
+    applied = []
+    with open(config_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                logger.info(f"Applying engine option: {line}")
+                client.send(line)
+                applied.append(line)
+            except EngineError as e:
+                logger.warning(f"Failed to apply config line '{line}': {e}")
+
+    client.sync()
+    return applied
+
+
+def ensure_config_exists():
+    """Ensures the config file exists, creating it if necessary."""
+    if not os.path.exists(CONFIG_FILE):
+        logger.warning("Config file missing during gameplay, regenerating...")
+        create_default_config(CONFIG_FILE)
+        return True  # Indicates config was recreated
+    return False  # Config already exists
+
+
+def find_stockfish():
+    """Resolves the Stockfish binary, falling back to the one on PATH."""
+    stockfish_path = resource_path("stockfish.exe" if os.name == "nt" else "stockfish")
+
+    if os.name != "nt" and not os.path.exists(stockfish_path):
+        sys_stock = shutil.which("stockfish")
+        if sys_stock:
+            logger.debug(f"Falling back to system Stockfish at {sys_stock}")
+            stockfish_path = sys_stock
+
+    if not os.path.exists(stockfish_path) and shutil.which(stockfish_path) is None:
+        raise FileNotFoundError(f"Stockfish not found at {stockfish_path}")
+    return stockfish_path
+
+
 class EngineService:
+    """
+    Owns the persistent Stockfish EngineClient. The engine is started on first
+    use and restarted if it exits or stops answering.
+    """
+
+    _client = None
+    _lock = threading.Lock()
+    _ponder = None  # (expected position key, search mode, Future) of the search on the predicted reply
+    _fingerprint = ""  # Engine name and applied options; part of every analysis cache key
+
     @staticmethod
     def initialize():
         logger.info("Initializing engine service")
-        return initialize_stockfish_at_startup()
+        try:
+            EngineService.client()
+            logger.info("Stockfish successfully initialized with config settings")
+            return True
+        except Exception as e:
+            logger.error(f"Error initializing Stockfish at startup: {e}")
+            return False
 
     @staticmethod
     def cleanup():
         logger.info("Cleaning up engine service")
-        cleanup_stockfish()
+        with EngineService._lock:
+            client, EngineService._client = EngineService._client, None
+            EngineService._ponder = None
+        if client is not None:
+            client.close()
+            logger.info("Stockfish process cleaned up")
+        _log_cache_stats()
+
+    @staticmethod
+    def client():
+        """
+        Returns the running EngineClient, starting (or restarting) it as needed.
+        """
+        with EngineService._lock:
+            config_recreated = ensure_config_exists()
+            client = EngineService._client
+            if client is not None and not client.alive:
+                logger.warning("Stockfish exited; restarting it")
+                client.close()
+                client = EngineService._client = None
+
+            if client is None:
+                stockfish_path = find_stockfish()
+                logger.debug(f"Using Stockfish path: {stockfish_path}")
+                client = EngineClient(stockfish_path)
+                try:
+                    client.start()
+                    if AppConfig.ENGINE_PONDER and "Ponder" in client.options:
+                        client.send("setoption name Ponder value true")
+                    options = load_engine_config(client)
+                except Exception:
+                    client.close()
+                    raise
+                EngineService._client = client
+                EngineService._fingerprint = _engine_fingerprint(client, options)
+                logger.info("Stockfish process initialized")
+            elif config_recreated:
+                logger.info("Reloading config into existing Stockfish process")
+                EngineService._fingerprint = _engine_fingerprint(client, load_engine_config(client))
+            return client
+
+    @staticmethod
+    def restart():
+        """Discards a hung engine so the next request starts a fresh one."""
+        EngineService.cleanup()
+
+    @staticmethod
+    def analyse(fen: str, depth: int):
+        """
+        Returns the Analysis of fen under the current search policy: from the
+        analysis cache if this position was searched the same way before,
+        else from the engine (and then cached).
+        """
+        client = EngineService.client()
+        signature = search_policy.signature(depth)
+        key = analysis_key(fen, signature, EngineService._fingerprint) if signature else None
+        if key is not None:
+            cached = analysis_cache.get(key)
+            if cached is not None:
+                EngineService.stop_pondering()
+                logger.info(f"Analysis cache hit: {cached.best_move} without searching "
+                            f"({cached.engine_ms:.0f} ms saved; {analysis_cache.hit_rate():.0%} hit rate)")
+                return cached
+
+        started = time.perf_counter()
+        result = EngineService.search(fen, depth)
+        info = result.info
+        analysis = Analysis(result.best_move, result.ponder,
+                            info.score_cp if info else None, info.score_mate if info else None,
+                            (time.perf_counter() - started) * 1000.0)
+        if result.stopped:
+            logger.warning("Search stopped at the latency ceiling; playing its best move so far")
+        elif key is not None and result.best_move and result.best_move != "(none)":
+            analysis_cache.put(key, analysis)
+        return analysis
+
+    @staticmethod
+    def search(fen: str, depth: int):
+        """
+        Searches fen with the limits chosen by search_policy and returns the
+        SearchResult. Past the policy's deadline the engine is stopped and its
+        best move so far is used; an engine that does not answer even then
+        raises EngineTimeout.
+        """
+        client = EngineService.client()
+        deadline = search_policy.deadline()
+        future = EngineService._take_ponder(client, fen, deadline)
+        if future is None:
+            future = client.search(fen, deadline=deadline, **search_policy.limits(depth, fen))
+        try:
+            result = future.result(deadline + STOP_GRACE + 1)
+        except FutureTimeoutError:
+            client.cancel(future)
+            raise EngineTimeout("Stockfish did not return a move") from None
+        return result
+
+    @staticmethod
+    def _take_ponder(client, fen, deadline):
+        """
+        Resolves the ponder search against the position actually reached:
+        ponderhit if the opponent played the predicted reply (returns its
+        Future), else stops it and returns None.
+        """
+        with EngineService._lock:
+            ponder, EngineService._ponder = EngineService._ponder, None
+        if ponder is None:
+            return None
+        expected, mode, future = ponder
+        if mode != search_policy.mode:
+            client.cancel(future)
+            return None
+        if future.done() and (future.cancelled() or future.exception() is not None):
+            return None
+        if _position_key(fen) == expected:
+            logger.info("Opponent played the predicted reply; ponderhit")
+            return client.ponderhit(future, deadline)
+        logger.info("Opponent did not play the predicted reply; searching afresh")
+        client.cancel(future)
+        return None
+
+    @staticmethod
+    def start_pondering(fen_after_move: str, ponder_move, depth: int):
+        """
+        Starts `go ponder` on the position after our move and the engine's
+        predicted reply, so the search is already running when it is played.
+        """
+        from executor.apply_move_to_fen import apply_move_to_fen  # executor imports this module
+
+        if not AppConfig.ENGINE_PONDER or not ponder_move:
+            return
+        try:
+            expected = apply_move_to_fen(fen_after_move, ponder_move)
+        except ValueError as e:
+            logger.debug(f"Not pondering on {ponder_move}: {e}")
+            return
+        client = EngineService.client()
+        future = client.search(fen_after_move, moves=[ponder_move], ponder=True,
+                               **search_policy.limits(depth, expected))
+        with EngineService._lock:
+            EngineService._ponder = (_position_key(expected), search_policy.mode, future)
+        logger.info(f"Pondering on predicted reply {ponder_move}")
+
+    @staticmethod
+    def stop_pondering():
+        """Stops a running ponder search, e.g. when auto mode is turned off."""
+        with EngineService._lock:
+            ponder, EngineService._ponder = EngineService._ponder, None
+            client = EngineService._client
+        if ponder is not None and client is not None:
+            client.cancel(ponder[-1])
+
+    @staticmethod
+    def updated_fen(fen: str, move: str):
+        """
+        Returns the FEN after playing `move`, as printed by the engine's `d`
+        command. Only used as a fallback and for FEN_CROSS_CHECK.
+        """
+        lines = EngineService.client().command(
+            [f"position fen {fen} moves {move}", "d"],
+            until=lambda line: line.startswith("Fen:"),
+            timeout=FEN_TIMEOUT,
+        )
+        return lines[-1].split("Fen:")[1].strip()
 
     @staticmethod
     def get_best_move(depth: int, fen: str, root=None, auto_mode_var=None):
-        logger.debug(f"Querying best move for FEN: {fen} at depth {depth}")
-        return get_best_move(depth, fen, root, auto_mode_var)
+        """
+        Returns (best_move, updated_fen, mate_flag); (None, None, False) after
+        reporting the error if the engine fails.
+        """
+        logger.debug(f"Querying best move for FEN: {fen} ({search_policy.mode} search, depth {depth})")
+        try:
+            logger.info("Getting best move from Stockfish")
+            result = EngineService.analyse(fen, depth)
+            if not result.best_move or result.best_move == "(none)":
+                return _handle_stockfish_failure(
+                    "Stockfish did not respond. Please download the correct version according to your CPU architecture.",
+                    root, auto_mode_var
+                )
+            logger.info(f"Best move received: {result.best_move}")
+
+            mate_flag = result.score_mate in (1, -1)
+            if mate_flag:
+                logger.info("Mate in 1 detected")
+
+            updated_fen = _apply_best_move(fen, result.best_move)
+            logger.info(f"Updated FEN: {updated_fen}")
+            if updated_fen:
+                EngineService.start_pondering(updated_fen, result.ponder, depth)
+            return result.best_move, updated_fen, mate_flag
+
+        except Exception as e:
+            logger.error(f"Stockfish error: {str(e)}")
+            EngineService.restart()
+            return _handle_error(e, root, auto_mode_var)
+
+
+def _engine_fingerprint(client, options):
+    """Short hash of the engine's name and the options applied to it."""
+    text = "\n".join([client.name or client.path, *options])
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def _log_cache_stats():
+    stats = analysis_cache.stats()
+    if not stats["lookups"]:
+        return
+    disk = "unavailable" if stats["disk_entries"] is None else \
+        f"{stats['disk_entries']} entries, {stats['disk_bytes'] / 1024:.0f} KiB"
+    logger.info(
+        f"Analysis cache: {stats['hits']}/{stats['lookups']} hits ({stats['hit_rate']:.0%}; "
+        f"{stats['memory_hits']} memory, {stats['disk_hits']} disk), "
+        f"{stats['saved_ms'] / 1000:.1f}s of search saved; store: {disk}"
+    )
+
+
+def _position_key(fen):
+    """Placement and side to move; the parts of a FEN read off the screen reliably."""
+    return tuple(fen.split()[:2])
+
+
+def _apply_best_move(fen, best_move):
+    """
+    Returns the FEN after best_move, computed locally. Falls back to the
+    engine's `d` output if the FEN cannot be parsed.
+    """
+    from executor.apply_move_to_fen import apply_move_to_fen  # executor imports this module
+
+    try:
+        updated_fen = apply_move_to_fen(fen, best_move)
+    except ValueError as e:
+        logger.warning(f"Could not apply {best_move} locally ({e}); asking the engine")
+        return EngineService.updated_fen(fen, best_move)
+
+    if FEN_CROSS_CHECK:
+        engine_fen = EngineService.updated_fen(fen, best_move)
+        if engine_fen != updated_fen:
+            logger.warning(f"FEN mismatch after {best_move}: local {updated_fen}, engine {engine_fen}")
+    return updated_fen
+
+
+def _handle_stockfish_failure(error_msg, root, auto_mode_var):
+    """
+    Handle cases where Stockfish fails to initialize or respond.
+    """
+    logger.error(error_msg)
+    _show_error_dialog(root, error_msg)
+    _disable_auto_mode(root, auto_mode_var)
+    return None, None, False
+
+
+def _handle_error(error, root, auto_mode_var):
+    """
+    Handle exceptions that occur during move calculation.
+    """
+    error_msg = f"Stockfish error: {str(error)}"
+    _show_error_dialog(root, error_msg)
+    _disable_auto_mode(root, auto_mode_var)
+    return None, None, False
+
+
+def _show_error_dialog(root, message):
+    """
+    Show error dialog if root window is available.
+    """
+    if root:
+        QTimer.singleShot(0, lambda: QMessageBox.critical(root, "Error", message))
+
+
+def _disable_auto_mode(root, auto_mode_var):
+    """
+    Disable auto mode if the variable is available.
+    """
+    if auto_mode_var and root:
+        if callable(auto_mode_var):
+            root.auto_mode_var = False
+            root.auto_mode_check.setChecked(False)
@@ -0,0 +1,136 @@
+import time
+import logging
+import threading
+from core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("depth", "movetime", "nodes", "clock")
+
+SEARCH_MODE_LABELS = {
+    "depth": "Fixed depth",
+    "movetime": "Move time",
+    "nodes": "Node budget",
+    "clock": "Game clock",
+}
+
+# Shortest hard ceiling in clock mode, however little time is left (seconds)
+MIN_CLOCK_DEADLINE = 0.1
+
+
+class SearchPolicy:
+    """
+    Chooses the UCI `go` limits for each search:
+
+    depth    -> go depth N (the depth slider)
+    movetime -> go movetime MS
+    nodes    -> go nodes N
+    clock    -> go wtime/btime/winc/binc from our own running clock
+
+    The opponent's clock is not read from the screen, so clock mode gives
+    both sides our remaining time. Our clock runs from start_turn() (the
+    opponent's move was seen) to end_turn() (our move was played), so
+    settling, capture and move execution are charged along with the search.
+    Whatever the mode, deadline() bounds the search: past it the engine is
+    stopped and its best move so far is played.
+    """
+
+    def __init__(self, mode=AppConfig.DEFAULT_SEARCH_MODE, movetime_ms=AppConfig.DEFAULT_MOVETIME_MS,
+                 nodes=AppConfig.DEFAULT_SEARCH_NODES, clock_seconds=AppConfig.DEFAULT_CLOCK_SECONDS,
+                 clock_increment=AppConfig.DEFAULT_CLOCK_INCREMENT, max_latency=AppConfig.MAX_MOVE_LATENCY):
+        self.mode = None
+        self.set_mode(mode)
+        self.movetime_ms = movetime_ms
+        self.nodes = nodes
+        self.clock_seconds = clock_seconds
+        self.clock_increment = clock_increment
+        self.max_latency = max_latency
+        self.clock_remaining = clock_seconds
+        self.turn_started = None  # perf_counter() when our clock started running
+        self._lock = threading.Lock()
+
+    def set_mode(self, mode):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'; expected one of {', '.join(SEARCH_MODES)}")
+        if mode != self.mode:
+            logger.info(f"Search mode set to {mode}")
+        self.mode = mode
+
+    def reset_clock(self):
+        """Starts a new game with a full clock."""
+        with self._lock:
+            self.clock_remaining = self.clock_seconds
+            self.turn_started = None
+
+    def start_turn(self):
+        """
+        Starts our clock, unless it is already running for this turn.
+        """
+        with self._lock:
+            if self.turn_started is None:
+                self.turn_started = time.perf_counter()
+
+    def end_turn(self):
+        """
+        Stops our clock once our move has been played and charges the turn.
+        """
+        with self._lock:
+            started, self.turn_started = self.turn_started, None
+        if started is not None:
+            self.record(time.perf_counter() - started)
+
+    def cancel_turn(self):
+        """Stops our clock without charging it, e.g. when no move was played."""
+        with self._lock:
+            self.turn_started = None
+
+    def _time_left(self):
+        with self._lock:
+            spent = time.perf_counter() - self.turn_started if self.turn_started is not None else 0.0
+            return max(0.0, self.clock_remaining - spent)
+
+    def limits(self, depth, fen):
+        """
+        Returns the `go` parameters for a search on fen (the side to move is us).
+        """
+        if self.mode == "movetime":
+            return {"movetime": self.movetime_ms}
+        if self.mode == "nodes":
+            return {"nodes": self.nodes}
+        if self.mode == "clock":
+            remaining_ms = int(self._time_left() * 1000)
+            increment_ms = int(self.clock_increment * 1000)
+            return {"wtime": remaining_ms, "btime": remaining_ms, "winc": increment_ms, "binc": increment_ms}
+        return {"depth": depth}
+
+    def signature(self, depth):
+        """
+        The limits as a cache key part, e.g. "depth=15"; None in clock mode,
+        whose searches depend on the time left.
+        """
+        if self.mode == "clock":
+            return None
+        return ",".join(f"{name}={value}" for name, value in self.limits(depth, None).items())
+
+    def deadline(self):
+        """
+        Seconds after which the running search is stopped.
+        """
+        if self.mode != "clock":
+            return self.max_latency
+        return min(self.max_latency, max(MIN_CLOCK_DEADLINE, self._time_left() / 2))
+
+    def record(self, elapsed):
+        """
+        Charges a finished turn to our clock (clock mode only).
+        """
+        if self.mode != "clock":
+            return
+        with self._lock:
+            self.clock_remaining = max(0.0, self.clock_remaining - elapsed) + self.clock_increment
+            remaining = self.clock_remaining
+        logger.debug(f"Clock: {remaining:.1f}s left after a {elapsed:.2f}s turn")
+
+
+# Shared policy; the GUI sets its mode and EngineService applies it to every search
+search_policy = SearchPolicy()
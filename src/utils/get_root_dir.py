@@ -0,0 +1,9 @@
+import os
+import sys
+
+def get_root_dir():
+    # When bundled by PyInstaller, __file__ doesn't point to the EXE location
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    else:
+        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
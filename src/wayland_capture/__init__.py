@@ -1 +1,2 @@
-from .wayland import WaylandInput
\ No newline at end of file
+from .wayland import WaylandInput
+from .screencopy import WaylandScreencopy, ScreencopyError
@@ -0,0 +1,268 @@
+import os
+import mmap
+import socket
+import struct
+import sys
+import numpy as np
+from .wayland import encode_wayland_string, log
+
+# wl_shm formats; the *8888 formats are little-endian, so XRGB8888 is B, G, R, X in memory
+WL_SHM_FORMAT_ARGB8888 = 0
+WL_SHM_FORMAT_XRGB8888 = 1
+WL_SHM_FORMAT_ABGR8888 = 0x34324241
+WL_SHM_FORMAT_XBGR8888 = 0x34324258
+BGRA_FORMATS = (WL_SHM_FORMAT_ARGB8888, WL_SHM_FORMAT_XRGB8888)
+RGBA_FORMATS = (WL_SHM_FORMAT_ABGR8888, WL_SHM_FORMAT_XBGR8888)
+
+# zwlr_screencopy_frame_v1.flags
+FLAG_Y_INVERT = 1
+
+SCREENCOPY_INTERFACE = "zwlr_screencopy_manager_v1"
+SCREENCOPY_MAX_VERSION = 3
+
+
+class ScreencopyError(Exception):
+    """The compositor does not support screencopy or a frame failed."""
+
+
+class WaylandScreencopy:
+    """
+    Minimal zwlr_screencopy_manager_v1 client on the raw Wayland wire protocol.
+
+    Frames are copied by the compositor into a wl_shm buffer backed by a
+    memfd that is mmap'd once and reused while the frame size stays the
+    same. capture() returns an (H, W, 4) BGRA NumPy view of that mapping, so
+    it is only valid until the next capture() on this client. Not thread-safe;
+    use one client per thread.
+    """
+
+    def __init__(self, output_index=0):
+        self.endianness = "<" if sys.byteorder == "little" else ">"
+        self.sock = self.connect_to_wayland()
+        self.next_id = 2
+        self.handlers = {1: self._on_display_event}
+        self.globals = {}
+        self.outputs = []
+
+        self.registry_id = self._new_id(self._on_registry_event)
+        self.send_message(1, 1, self._uint(self.registry_id))  # wl_display.get_registry
+        self._roundtrip()
+
+        if SCREENCOPY_INTERFACE not in self.globals:
+            self.close()
+            raise ScreencopyError(f"Compositor does not offer {SCREENCOPY_INTERFACE}")
+        if "wl_shm" not in self.globals or not self.outputs:
+            self.close()
+            raise ScreencopyError("Compositor does not offer wl_shm or any wl_output")
+
+        self.shm_id = self._bind("wl_shm", 1)
+        self.manager_version = min(self.globals[SCREENCOPY_INTERFACE][1], SCREENCOPY_MAX_VERSION)
+        self.manager_id = self._bind(SCREENCOPY_INTERFACE, self.manager_version)
+        output_name, output_version = self.outputs[min(output_index, len(self.outputs) - 1)]
+        self.scale = 1  # Physical pixels per logical unit; wl_output v2 reports it
+        self.output_id = self._bind_name(output_name, "wl_output", min(output_version, 2), self._on_output_event)
+        self._roundtrip()
+
+        self.memfd = None
+        self.mapping = None
+        self.pool_id = None
+        self.buffer_id = None
+        self.buffer_layout = None  # (format, width, height, stride)
+        self.frame = None
+
+    # --- Wire protocol -------------------------------------------------------
+
+    def get_socket_path(self):
+        wayland_display = os.getenv("WAYLAND_DISPLAY", "wayland-0")
+        if os.path.isabs(wayland_display):
+            return wayland_display
+        runtime_dir = os.getenv("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+        return os.path.join(runtime_dir, wayland_display)
+
+    def connect_to_wayland(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.get_socket_path())
+        log(f"Screencopy connected to Wayland server at {self.get_socket_path()}")
+        return sock
+
+    def _uint(self, *values):
+        return struct.pack(f"{self.endianness}{'I' * len(values)}", *values)
+
+    def _int(self, *values):
+        return struct.pack(f"{self.endianness}{'i' * len(values)}", *values)
+
+    def _new_id(self, handler=None):
+        object_id = self.next_id
+        self.next_id += 1
+        if handler is not None:
+            self.handlers[object_id] = handler
+        return object_id
+
+    def send_message(self, object_id, opcode, payload, fds=None):
+        header = struct.pack(f"{self.endianness}IHH", object_id, opcode, 8 + len(payload))
+        if fds:
+            socket.send_fds(self.sock, [header + payload], fds)
+        else:
+            self.sock.sendall(header + payload)
+
+    def _recv_exact(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ScreencopyError("Wayland connection closed")
+            data.extend(chunk)
+        return bytes(data)
+
+    def _dispatch_one(self):
+        object_id, size_opcode = struct.unpack(f"{self.endianness}II", self._recv_exact(8))
+        size, opcode = size_opcode >> 16, size_opcode & 0xFFFF
+        payload = self._recv_exact(size - 8)
+        handler = self.handlers.get(object_id)
+        if handler is not None:
+            handler(opcode, payload)
+
+    def _roundtrip(self):
+        done = []
+        callback_id = self._new_id(lambda opcode, payload: done.append(True))
+        self.send_message(1, 0, self._uint(callback_id))  # wl_display.sync
+        while not done:
+            self._dispatch_one()
+        del self.handlers[callback_id]
+
+    def _read_string(self, payload, offset):
+        length = struct.unpack_from(f"{self.endianness}I", payload, offset)[0]
+        text = payload[offset + 4:offset + 4 + length - 1].decode("utf-8")
+        return text, offset + 4 + ((length + 3) & ~3)
+
+    def _on_display_event(self, opcode, payload):
+        if opcode == 0:  # error
+            object_id, code = struct.unpack_from(f"{self.endianness}II", payload)
+            message, _ = self._read_string(payload, 8)
+            raise ScreencopyError(f"Wayland error on object {object_id} (code {code}): {message}")
+
+    def _on_registry_event(self, opcode, payload):
+        if opcode != 0:  # only global
+            return
+        name = struct.unpack_from(f"{self.endianness}I", payload)[0]
+        interface, offset = self._read_string(payload, 4)
+        version = struct.unpack_from(f"{self.endianness}I", payload, offset)[0]
+        log(f"Discovered global: {interface} (name {name}, version {version})")
+        if interface == "wl_output":
+            self.outputs.append((name, version))
+        else:
+            self.globals.setdefault(interface, (name, version))
+
+    def _on_output_event(self, opcode, payload):
+        if opcode == 3:  # scale
+            self.scale = max(1, struct.unpack_from(f"{self.endianness}i", payload)[0])
+
+    def _bind_name(self, name, interface, version, handler=None):
+        object_id = self._new_id(handler)
+        payload = (self._uint(name) + encode_wayland_string(interface) + self._uint(version, object_id))
+        self.send_message(self.registry_id, 0, payload)  # wl_registry.bind
+        return object_id
+
+    def _bind(self, interface, version, handler=None):
+        return self._bind_name(self.globals[interface][0], interface, version, handler)
+
+    # --- Buffers ---------------------------------------------------------------
+
+    def _release_buffer(self):
+        if self.buffer_id is not None:
+            self.send_message(self.buffer_id, 0, b"")  # wl_buffer.destroy
+            self.send_message(self.pool_id, 1, b"")    # wl_shm_pool.destroy
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:
+                pass  # A caller still holds a frame view; unmapped once it is dropped
+        if self.memfd is not None:
+            os.close(self.memfd)
+        self.memfd = self.mapping = self.pool_id = self.buffer_id = self.buffer_layout = None
+
+    def _ensure_buffer(self, layout):
+        if layout == self.buffer_layout:
+            return
+        self._release_buffer()
+        shm_format, width, height, stride = layout
+        size = stride * height
+        self.memfd = os.memfd_create("chesspilot-screencopy", os.MFD_CLOEXEC)
+        os.ftruncate(self.memfd, size)
+        self.mapping = mmap.mmap(self.memfd, size)
+
+        self.pool_id = self._new_id()
+        self.send_message(self.shm_id, 0, self._uint(self.pool_id) + self._int(size), fds=[self.memfd])
+        self.buffer_id = self._new_id()
+        self.send_message(
+            self.pool_id, 0,
+            self._uint(self.buffer_id) + self._int(0, width, height, stride) + self._uint(shm_format),
+        )
+        self.buffer_layout = layout
+        log(f"Allocated {width}x{height} screencopy buffer (format {shm_format:#x}, stride {stride})")
+
+    # --- Frames ----------------------------------------------------------------
+
+    def _on_frame_event(self, opcode, payload):
+        frame = self.frame
+        if opcode == 0:  # buffer: format, width, height, stride
+            layout = struct.unpack_from(f"{self.endianness}IIII", payload)
+            if frame["layout"] is None and layout[0] in BGRA_FORMATS + RGBA_FORMATS:
+                frame["layout"] = layout
+            if self.manager_version < 3:
+                frame["buffers_done"] = True
+        elif opcode == 1:  # flags
+            frame["flags"] = struct.unpack_from(f"{self.endianness}I", payload)[0]
+        elif opcode == 2:  # ready
+            frame["ready"] = True
+        elif opcode == 3:  # failed
+            frame["failed"] = True
+        elif opcode == 6:  # buffer_done
+            frame["buffers_done"] = True
+
+    def _wait_frame(self, key):
+        while not (self.frame[key] or self.frame["failed"]):
+            self._dispatch_one()
+
+    def capture(self, region=None, overlay_cursor=False):
+        """
+        Captures the output, or the (x, y, w, h) region of it in logical
+        coordinates, and returns an (H, W, 4) BGRA array.
+        """
+        self.frame = {"layout": None, "flags": 0, "buffers_done": False, "ready": False, "failed": False}
+        frame_id = self._new_id(self._on_frame_event)
+        if region is None:
+            self.send_message(self.manager_id, 0, self._uint(frame_id) + self._int(int(overlay_cursor))
+                              + self._uint(self.output_id))
+        else:
+            x, y, w, h = (int(v) for v in region)
+            self.send_message(self.manager_id, 1, self._uint(frame_id) + self._int(int(overlay_cursor))
+                              + self._uint(self.output_id) + self._int(x, y, w, h))
+        try:
+            self._wait_frame("buffers_done")
+            if self.frame["failed"] or self.frame["layout"] is None:
+                raise ScreencopyError("Compositor offered no usable shm buffer for screencopy")
+
+            self._ensure_buffer(self.frame["layout"])
+            self.send_message(frame_id, 0, self._uint(self.buffer_id))  # copy
+            self._wait_frame("ready")
+            if self.frame["failed"]:
+                raise ScreencopyError("Screencopy frame failed")
+        finally:
+            self.send_message(frame_id, 1, b"")  # destroy
+            del self.handlers[frame_id]
+
+        shm_format, width, height, stride = self.buffer_layout
+        frame = np.frombuffer(self.mapping, dtype=np.uint8).reshape(height, stride // 4, 4)[:, :width]
+        if self.frame["flags"] & FLAG_Y_INVERT:
+            frame = frame[::-1]
+        if shm_format in RGBA_FORMATS:
+            frame = frame[..., [2, 1, 0, 3]]  # Copies; only some compositors use these
+        return frame
+
+    def close(self):
+        try:
+            self._release_buffer()
+        except (OSError, AttributeError):
+            pass
+        self.sock.close()